@@ -0,0 +1,268 @@
+"""Offline scaling benchmark for the Kakao Navi integration.
+
+Boots a bare Home Assistant core, points the integration at a local
+FakeKakaoServer and drives 1/10/100 routes (configurable) through
+``async_setup_entry`` and a number of refresh cycles. For each route count it
+reports setup time, per-route refresh latency percentiles, HTTP calls per
+refresh cycle, executor usage and traced memory per route. With
+``--matrix-targets`` the same route counts run again as matrix routes, each
+answering that many targets through the multi-route endpoints.
+
+Requires ``homeassistant`` to be installed. Run from the repository root::
+
+    python -m benchmarks.bench_kakaonavi --routes 1 10 100 --cycles 5 --matrix-targets 10
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import asyncio
+import functools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from homeassistant.core import HomeAssistant
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_kakao_server import FakeKakaoServer, FakeServerConfig, LOCAL_SEARCH_PATH, NAVI_PREFIX  # noqa: E402
+from custom_components.ha_kakaonavi import api, async_setup_entry, async_unload_entry  # noqa: E402
+from custom_components.ha_kakaonavi.cache import async_get_response_cache  # noqa: E402
+from custom_components.ha_kakaonavi.const import (  # noqa: E402
+    DOMAIN, CONF_APIKEY, CONF_ROUTES, CONF_ROUTE_NAME, CONF_START, CONF_END, CONF_PRIORITY,
+    DATA_QUOTA_MANAGERS, PRIORITY_RECOMMEND, PRIORITY_TIME, CONF_ROUTE_TYPE, ROUTE_TYPE_MATRIX,
+    CONF_MATRIX_DIRECTION, MATRIX_ONE_TO_MANY, MATRIX_MANY_TO_ONE, CONF_LOCATION, CONF_TARGETS,
+    CONF_TARGET_NAME, CONF_TARGET_ADDRESS, CONF_RADIUS, DEFAULT_MATRIX_RADIUS,
+)
+from custom_components.ha_kakaonavi.quota import KakaoNaviQuotaManager, api_key_id  # noqa: E402
+
+BENCH_API_KEY = "benchmark-api-key"
+
+
+class BenchConfigEntry:
+    """The parts of ConfigEntry that async_setup_entry relies on."""
+
+    def __init__(self, entry_id: str, routes: List[Dict[str, Any]]) -> None:
+        self.entry_id = entry_id
+        self.title = entry_id
+        self.data = {CONF_APIKEY: BENCH_API_KEY}
+        self.options = {CONF_ROUTES: routes}
+        self.background_tasks: List[asyncio.Task] = []
+        self._on_unload: List[Callable[[], None]] = []
+
+    def async_on_unload(self, func: Callable[[], None]) -> None:
+        self._on_unload.append(func)
+
+    def async_create_background_task(self, hass: HomeAssistant, target: Any, name: str) -> asyncio.Task:
+        task = hass.async_create_task(target)
+        self.background_tasks.append(task)
+        return task
+
+    def add_update_listener(self, listener: Callable) -> Callable[[], None]:
+        return lambda: None
+
+    def async_run_unload_callbacks(self) -> None:
+        while self._on_unload:
+            self._on_unload.pop()()
+
+
+class PlatformlessConfigEntries:
+    """Skips entity platforms; the benchmark measures the API and scheduling path."""
+
+    async def async_forward_entry_setups(self, entry: BenchConfigEntry, platforms: List[str]) -> None:
+        return None
+
+    async def async_unload_platforms(self, entry: BenchConfigEntry, platforms: List[str]) -> bool:
+        return True
+
+
+def build_routes(count: int) -> List[Dict[str, Any]]:
+    # A few shared destinations, as in a real household config.
+    return [{
+        CONF_ROUTE_NAME: f"route {index}",
+        CONF_START: f"서울특별시 출발로 {index}",
+        CONF_END: f"서울특별시 도착로 {index % 7}",
+        CONF_PRIORITY: PRIORITY_RECOMMEND,
+    } for index in range(count)]
+
+
+def build_matrix_routes(count: int, targets: int) -> List[Dict[str, Any]]:
+    # Alternate directions so both multi-route endpoints are exercised.
+    return [{
+        CONF_ROUTE_NAME: f"matrix {index}",
+        CONF_ROUTE_TYPE: ROUTE_TYPE_MATRIX,
+        CONF_MATRIX_DIRECTION: MATRIX_ONE_TO_MANY if index % 2 == 0 else MATRIX_MANY_TO_ONE,
+        CONF_LOCATION: f"서울특별시 기준로 {index}",
+        CONF_TARGETS: [{CONF_TARGET_NAME: f"target {target}", CONF_TARGET_ADDRESS: f"서울특별시 목적로 {target}"}
+                       for target in range(targets)],
+        CONF_PRIORITY: PRIORITY_TIME,
+        CONF_RADIUS: DEFAULT_MATRIX_RADIUS,
+    } for index in range(count)]
+
+
+def percentile(values: List[float], share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(share * len(ordered)), len(ordered) - 1)]
+
+
+async def create_hass(config_dir: str) -> HomeAssistant:
+    try:
+        hass = HomeAssistant(config_dir)
+    except TypeError:
+        # Releases before 2024.3 take no arguments.
+        hass = HomeAssistant()
+        hass.config.config_dir = config_dir
+    hass.config_entries = PlatformlessConfigEntries()
+    return hass
+
+
+async def run_scenario(server: FakeKakaoServer, route_count: int, cycles: int,
+                       requests_per_second: float, keep_response_cache: bool,
+                       matrix_targets: int = 0) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await create_hass(config_dir)
+
+        executor_jobs = 0
+        original_add_executor_job = hass.async_add_executor_job
+
+        def counting_add_executor_job(target, *args):
+            nonlocal executor_jobs
+            executor_jobs += 1
+            return original_add_executor_job(target, *args)
+
+        hass.async_add_executor_job = counting_add_executor_job
+
+        # Lift the production pacing unless the run asks for it.
+        hass.data.setdefault(DOMAIN, {}).setdefault(DATA_QUOTA_MANAGERS, {})[api_key_id(BENCH_API_KEY)] = (
+            KakaoNaviQuotaManager(hass, BENCH_API_KEY, daily_limit=10 ** 9, requests_per_second=requests_per_second))
+
+        baseline_threads = threading.active_count()
+        peak_threads = baseline_threads
+        sampling = True
+
+        async def sample_threads() -> None:
+            nonlocal peak_threads
+            while sampling:
+                peak_threads = max(peak_threads, threading.active_count())
+                await asyncio.sleep(0.01)
+
+        sampler = asyncio.ensure_future(sample_threads())
+        if matrix_targets:
+            entry = BenchConfigEntry(f"bench_matrix_{route_count}", build_matrix_routes(route_count, matrix_targets))
+        else:
+            entry = BenchConfigEntry(f"bench_{route_count}", build_routes(route_count))
+
+        server.reset_counters()
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        await async_setup_entry(hass, entry)
+        # Setup returns before the first refresh; time both, as a user waits for both.
+        await asyncio.gather(*entry.background_tasks)
+        setup_time = time.perf_counter() - started
+        memory_after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        setup_calls = dict(server.calls)
+
+        scheduler = hass.data[DOMAIN][entry.entry_id]
+        latencies: List[float] = []
+        for coordinator in scheduler.coordinators.values():
+            coordinator._async_update_data = _timed(coordinator._async_update_data, latencies)
+
+        calls_per_cycle: List[int] = []
+        failed_routes = 0
+        for _ in range(cycles):
+            if not keep_response_cache:
+                async_get_response_cache(hass).clear()
+            server.reset_counters()
+            await scheduler.async_first_refresh()
+            calls_per_cycle.append(sum(server.calls.values()))
+            failed_routes = sum(not coordinator.last_update_success for coordinator in scheduler.coordinators.values())
+
+        sampling = False
+        await sampler
+        await async_unload_entry(hass, entry)
+        entry.async_run_unload_callbacks()
+        await hass.async_stop(force=True)
+
+    return {
+        "routes": route_count,
+        "matrix_targets": matrix_targets,
+        "setup_time_s": round(setup_time, 3),
+        "setup_http_calls": setup_calls,
+        "refresh_p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "refresh_p90_ms": round(percentile(latencies, 0.90) * 1000, 1),
+        "refresh_p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "http_calls_per_cycle": round(sum(calls_per_cycle) / len(calls_per_cycle), 1) if calls_per_cycle else 0,
+        "failed_routes_last_cycle": failed_routes,
+        "executor_jobs": executor_jobs,
+        "peak_extra_threads": peak_threads - baseline_threads,
+        "memory_per_route_kb": round((memory_after - memory_before) / route_count / 1024, 1),
+    }
+
+
+def _timed(update: Callable, latencies: List[float]) -> Callable:
+    @functools.wraps(update)
+    async def wrapper():
+        started = time.perf_counter()
+        try:
+            return await update()
+        finally:
+            latencies.append(time.perf_counter() - started)
+    return wrapper
+
+
+async def async_main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    server = FakeKakaoServer(FakeServerConfig(
+        latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=args.seed))
+    base_url = await server.async_start()
+    api.BASE_NAVI_URL = f"{base_url}{NAVI_PREFIX}"
+    api.BASE_LOCAL_URL = f"{base_url}{LOCAL_SEARCH_PATH}"
+    try:
+        results = [
+            await run_scenario(server, count, args.cycles, args.requests_per_second, args.keep_response_cache)
+            for count in args.routes
+        ]
+        if args.matrix_targets:
+            results.extend([
+                await run_scenario(server, count, args.cycles, args.requests_per_second, args.keep_response_cache,
+                                   matrix_targets=args.matrix_targets)
+                for count in args.routes
+            ])
+        return results
+    finally:
+        await server.async_stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-second", type=float, default=1000,
+                        help="token bucket rate; the integration default is much lower")
+    parser.add_argument("--keep-response-cache", action="store_true",
+                        help="do not clear the response cache between refresh cycles")
+    parser.add_argument("--matrix-targets", type=int, default=0,
+                        help="also run every route count as matrix routes with this many targets (at most 30)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(async_main(args))
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Local stand-in for the Kakao Mobility directions and Kakao local search APIs.
+
+Serves ``/v1/directions``, ``/v1/future/directions``, the multi-route
+``/v1/destinations/directions`` and ``/v1/origins/directions`` and
+``/v2/local/search/address.json`` with deterministic answers, and can inject
+latency, server errors and 429 responses. Every request is counted per
+endpoint so a benchmark can report HTTP calls per refresh.
+
+Run standalone with ``python -m benchmarks.fake_kakao_server --port 8080``.
+"""
+from typing import Dict, List, Optional, Tuple
+from collections import Counter
+from dataclasses import dataclass
+import argparse
+import asyncio
+import hashlib
+import random
+from aiohttp import web
+
+NAVI_PREFIX = "/v1"
+LOCAL_SEARCH_PATH = "/v2/local/search/address.json"
+
+
+@dataclass
+class FakeServerConfig:
+    latency: float = 0.05  # seconds
+    jitter: float = 0.02  # seconds
+    error_rate: float = 0.0  # share of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # share of requests answered with HTTP 429
+    retry_after: int = 1  # seconds, sent with every 429
+    sections: int = 3  # route sections per response, to mimic payload size
+    seed: Optional[int] = None
+
+
+class FakeKakaoServer:
+    def __init__(self, config: Optional[FakeServerConfig] = None) -> None:
+        self.config = config or FakeServerConfig()
+        self.calls: Counter = Counter()
+        self._random = random.Random(self.config.seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get(f"{NAVI_PREFIX}/directions", self._directions)
+        app.router.add_get(f"{NAVI_PREFIX}/future/directions", self._directions)
+        app.router.add_post(f"{NAVI_PREFIX}/destinations/directions", self._destinations_directions)
+        app.router.add_post(f"{NAVI_PREFIX}/origins/directions", self._origins_directions)
+        app.router.add_get(LOCAL_SEARCH_PATH, self._address)
+        return app
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def async_stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reset_counters(self) -> None:
+        self.calls.clear()
+
+    async def _simulate(self, request: web.Request) -> Optional[web.Response]:
+        self.calls[request.path] += 1
+        await asyncio.sleep(max(self.config.latency + self._random.uniform(-1, 1) * self.config.jitter, 0))
+        roll = self._random.random()
+        if roll < self.config.rate_limit_rate:
+            return web.json_response(
+                {"code": -10, "msg": "API limit has been exceeded."},
+                status=429,
+                headers={"Retry-After": str(self.config.retry_after)},
+            )
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            return web.json_response({"code": -1, "msg": "internal error"}, status=500)
+        return None
+
+    async def _address(self, request: web.Request) -> web.Response:
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        query = request.query.get("query", "")
+        x, y = _coords_for(query)
+        return web.json_response({
+            "meta": {"total_count": 1},
+            "documents": [{"address_name": query, "x": f"{x:.6f}", "y": f"{y:.6f}"}],
+        })
+
+    async def _directions(self, request: web.Request) -> web.Response:
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        origin = request.query.get("origin", "")
+        destination = request.query.get("destination", "")
+        seed = _digest(f"{origin}|{destination}|{request.query.get('departure_time', '')}")
+        duration = 600 + seed % 3000
+        distance = 2000 + seed % 40000
+        return web.json_response({
+            "trans_id": f"fake-{seed:x}",
+            "routes": [{
+                "result_code": 0,
+                "result_msg": "길찾기 성공",
+                "summary": {
+                    "origin": {"x": 0, "y": 0},
+                    "destination": {"x": 0, "y": 0},
+                    "priority": request.query.get("priority", "RECOMMEND"),
+                    "fare": {"taxi": 3800 + distance // 10, "toll": 0},
+                    "distance": distance,
+                    "duration": duration,
+                },
+                "sections": [_section(distance, duration, index) for index in range(self.config.sections)],
+            }],
+        })
+
+    async def _destinations_directions(self, request: web.Request) -> web.Response:
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        body = await request.json()
+        return web.json_response(_matrix_response(
+            [(body["origin"], destination) for destination in body["destinations"]], body["radius"]))
+
+    async def _origins_directions(self, request: web.Request) -> web.Response:
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        body = await request.json()
+        return web.json_response(_matrix_response(
+            [(origin, body["destination"]) for origin in body["origins"]], body["radius"]))
+
+
+def _matrix_response(pairs: List[Tuple[Dict, Dict]], radius: int) -> Dict:
+    routes = []
+    for origin, destination in pairs:
+        keyed = destination if "key" in destination else origin
+        seed = _digest(f"{origin['x']},{origin['y']}|{destination['x']},{destination['y']}")
+        # Shorter than single routes, so that most targets fall within the default radius.
+        distance = 2000 + seed % 10000
+        if distance > radius:
+            # What the API answers for a target outside the search radius.
+            routes.append({"result_code": 104, "result_msg": "출발지와 도착지가 너무 멉니다",
+                           "key": keyed["key"]})
+            continue
+        routes.append({
+            "result_code": 0,
+            "result_msg": "길찾기 성공",
+            "key": keyed["key"],
+            "summary": {"distance": distance, "duration": 600 + seed % 3000},
+        })
+    return {"trans_id": f"fake-matrix-{len(pairs)}", "routes": routes}
+
+
+def _digest(value: str) -> int:
+    return int(hashlib.sha256(value.encode()).hexdigest()[:8], 16)
+
+
+def _coords_for(query: str):
+    seed = _digest(query)
+    return 126.8 + (seed % 4000) / 10000, 37.4 + (seed // 4000 % 3000) / 10000
+
+
+def _section(distance: int, duration: int, index: int) -> Dict:
+    vertexes = [coordinate for step in range(50) for coordinate in (127.0 + step / 1000, 37.5 + step / 1000)]
+    return {
+        "distance": distance,
+        "duration": duration,
+        "roads": [{"name": f"road {index}-{road}", "distance": 100, "duration": 10, "traffic_speed": 30.0,
+                   "traffic_state": 2, "vertexes": vertexes} for road in range(10)],
+        "guides": [{"name": f"guide {guide}", "x": 127.0, "y": 37.5, "distance": 100, "duration": 10,
+                    "type": 1, "guidance": "직진", "road_index": guide} for guide in range(10)],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=FakeServerConfig.latency)
+    parser.add_argument("--error-rate", type=float, default=FakeServerConfig.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=FakeServerConfig.rate_limit_rate)
+    args = parser.parse_args()
+    server = FakeKakaoServer(FakeServerConfig(
+        latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate))
+    web.run_app(server.build_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,20 @@
 import logging
+import voluptuous as vol
 from homeassistant.core import HomeAssistant
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.exceptions import ConfigEntryNotReady
-from .coordinator import KakaoNaviDataUpdateCoordinator
+from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.typing import ConfigType
+from .coordinator import create_route_coordinator
 from .api import KakaoNaviApiClient
+from .history import KakaoNaviHistoryStore, async_remove_history
+from .cache import async_get_geocode_cache, async_get_response_cache
+from .quota import async_get_quota_manager
+from .routes import ROUTE_SCHEMA
+from .resilience import async_get_circuit_breaker
+from .scheduler import KakaoNaviRouteScheduler
+from .services import async_setup_services
+from .storage import KakaoNaviRouteDataStore, async_remove_route_data
 from .const import (
     DOMAIN,
     CONF_APIKEY,
@@ -13,39 +24,82 @@ from .const import (
     CONF_END,
     CONF_WAYPOINT,
     CONF_PRIORITY,
-    CONF_UPDATE_INTERVAL,
-    CONF_FUTURE_UPDATE_INTERVAL,
-    DEFAULT_UPDATE_INTERVAL,
-    DEFAULT_FUTURE_UPDATE_INTERVAL,
+    CONF_GEOCODE_CACHE_TTL,
+    DEFAULT_GEOCODE_CACHE_TTL,
     PRIORITY_RECOMMEND,
     PLATFORMS
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Routes listed in YAML are imported into the config entry of the same API key
+# (added or updated by name); routes that are not listed are left alone.
+CONFIG_SCHEMA = vol.Schema({
+    DOMAIN: vol.All(cv.ensure_list, [vol.Schema({
+        vol.Required(CONF_APIKEY): cv.string,
+        vol.Required(CONF_ROUTES): vol.All(cv.ensure_list, [ROUTE_SCHEMA]),
+    })]),
+}, extra=vol.ALLOW_EXTRA)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    await async_setup_services(hass)
+    for import_config in config.get(DOMAIN, []):
+        hass.async_create_task(hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": SOURCE_IMPORT}, data=import_config))
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
 
-    client = KakaoNaviApiClient(entry.data[CONF_APIKEY])
+    geocode_cache = await async_get_geocode_cache(hass)
+    client = KakaoNaviApiClient(
+        entry.data[CONF_APIKEY],
+        async_get_clientsession(hass),
+        quota=await async_get_quota_manager(hass, entry.data[CONF_APIKEY]),
+        circuit_breaker=async_get_circuit_breaker(hass, entry.data[CONF_APIKEY]),
+        geocode_cache=geocode_cache,
+        response_cache=async_get_response_cache(hass),
+        geocode_cache_ttl=entry.options.get(CONF_GEOCODE_CACHE_TTL, DEFAULT_GEOCODE_CACHE_TTL),
+    )
 
     routes = entry.options.get(CONF_ROUTES, [])
 
-    coordinators = {}
-    for route in routes:
-        try:
-            coordinator = KakaoNaviDataUpdateCoordinator(hass, client, route)
-            await coordinator.async_config_entry_first_refresh()
-            coordinators[route[CONF_ROUTE_NAME]] = coordinator
-        except Exception as err:
-            _LOGGER.error(f"Error initializing coordinator for route {route.get(CONF_ROUTE_NAME, 'Unknown')}: {str(err)}")
-            raise ConfigEntryNotReady from err
+    data_store = KakaoNaviRouteDataStore(hass, entry.entry_id)
+    history_store = KakaoNaviHistoryStore(hass, entry.entry_id)
+    await history_store.async_load(route[CONF_ROUTE_NAME] for route in routes)
+    coordinators = {
+        route[CONF_ROUTE_NAME]: create_route_coordinator(
+            hass, client, route, entry.options, data_store, history_store)
+        for route in routes
+    }
+
+    # Routes with recent saved data show it right away and refresh later in the background.
+    restored = await data_store.async_load(coordinators)
+    for route_name, data in restored.items():
+        coordinators[route_name].restore(data)
+
+    scheduler = KakaoNaviRouteScheduler(hass, client, coordinators, options=entry.options,
+                                        data_store=data_store, history_store=history_store)
+    scheduler.async_start()
+    entry.async_on_unload(scheduler.async_stop)
 
-    hass.data[DOMAIN][entry.entry_id] = coordinators
+    hass.data[DOMAIN][entry.entry_id] = scheduler
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Setup does not wait on the API: new routes start out unavailable and fill in as they are fetched.
+    entry.async_create_background_task(
+        hass,
+        scheduler.async_first_refresh([name for name in coordinators if name not in restored]),
+        f"{DOMAIN} first refresh {entry.title}",
+    )
+
     entry.async_on_unload(entry.add_update_listener(update_listener))
+    if scheduler.options != dict(entry.options):
+        # The options changed while the entry was being set up, e.g. by a YAML import.
+        hass.async_create_task(update_listener(hass, entry))
 
     return True
 
@@ -59,14 +113,20 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the data saved for a config entry that is being deleted."""
+    await async_remove_route_data(hass, entry.entry_id)
+    await async_remove_history(hass, entry.entry_id)
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Handle options update."""
-    coordinators = hass.data[DOMAIN][entry.entry_id]
-    for coordinator in coordinators.values():
-        coordinator.set_update_interval(entry.options.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL))
-        coordinator.set_future_update_interval(
-            entry.options.get(CONF_FUTURE_UPDATE_INTERVAL, DEFAULT_FUTURE_UPDATE_INTERVAL))
-
-    # Instead of reloading, update the existing entry
-    hass.config_entries.async_update_entry(entry)
-    await hass.config_entries.async_reload(entry.entry_id)
\ No newline at end of file
+    """Apply changed options in place, keeping the session, caches and unchanged routes."""
+    scheduler = hass.data[DOMAIN][entry.entry_id]
+    if scheduler.options == dict(entry.options):
+        # Already applied in place, e.g. by the manage_routes service.
+        return
+    scheduler.client.set_geocode_cache(
+        await async_get_geocode_cache(hass),
+        entry.options.get(CONF_GEOCODE_CACHE_TTL, DEFAULT_GEOCODE_CACHE_TTL))
+    changes = await scheduler.async_apply_options(entry.options)
+    _LOGGER.debug(f"Applied options of {entry.title}: {changes}")
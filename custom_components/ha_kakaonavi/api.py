@@ -1,75 +1,227 @@
-from typing import Dict, Any, Optional
-import requests
+from typing import Dict, Any, Iterable, Optional
+import asyncio
+import json
+import logging
+import aiohttp
 from homeassistant.exceptions import HomeAssistantError
-from .const import PRIORITY_RECOMMEND
+from .cache import GeocodeCache, ResponseCache, is_coordinates, normalize_address, normalize_coords
+from .metrics import record_cache_lookup, record_retry
+from .quota import KakaoNaviQuotaManager
+from .resilience import CircuitBreaker, CircuitOpenError, backoff_delay, parse_retry_after
+from .const import (
+    PRIORITY_RECOMMEND, DEFAULT_GEOCODE_CACHE_TTL, DEFAULT_REQUEST_TIMEOUT, MAX_RETRIES, RETRY_MAX_DELAY,
+    DEFAULT_MAX_CONCURRENT_REQUESTS, VALIDATION_MAX_CONCURRENT_REQUESTS
+)
+
+_LOGGER = logging.getLogger(__name__)
 
 BASE_NAVI_URL = "https://apis-navi.kakaomobility.com/v1"
 BASE_LOCAL_URL = "https://dapi.kakao.com/v2/local/search/address.json"
 
 class KakaoNaviApiClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, session: aiohttp.ClientSession,
+                 quota: Optional[KakaoNaviQuotaManager] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 geocode_cache: Optional[GeocodeCache] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 geocode_cache_ttl: int = DEFAULT_GEOCODE_CACHE_TTL,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS):
         self.api_key = api_key
-        self.session = requests.Session()
-        self.session.headers.update({"Authorization": f"KakaoAK {api_key}"})
+        # The session is Home Assistant's shared one, so connection pooling,
+        # keep-alive and DNS caching come from its connector.
+        self.session = session
+        self._headers = {"Authorization": f"KakaoAK {api_key}"}
+        self._timeout = aiohttp.ClientTimeout(total=request_timeout)
+        # Caps requests rather than routes: one matrix or forecast refresh can make several at once.
+        self._request_semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self.quota = quota
+        self.circuit_breaker = circuit_breaker
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
+        self.set_geocode_cache(geocode_cache, geocode_cache_ttl)
+
+    def set_geocode_cache(self, geocode_cache: Optional[GeocodeCache], ttl_days: int) -> None:
+        # A TTL of zero disables geocode caching for this client.
+        self.geocode_cache = geocode_cache if ttl_days else None
+        self.geocode_cache_ttl = ttl_days * 86400
+
+    async def _get(self, url: str, params: Dict[str, str]) -> Dict[str, Any]:
+        return await self._request("GET", url, params=params)
+
+    async def _post(self, url: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request("POST", url, body=body)
+
+    async def _request(self, method: str, url: str, params: Optional[Dict[str, str]] = None,
+                       body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Request with retries for transient failures (429, 5xx, connection errors, timeouts)."""
+        breaker = self.circuit_breaker
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow_request():
+                raise CircuitOpenError("Kakao API keeps failing, requests are paused for now")
+            # Only the navi endpoints count against the key's daily directions quota.
+            if self.quota is not None and url.startswith(BASE_NAVI_URL):
+                await self.quota.async_acquire()
 
-    def test_api_key(self) -> None:
+            retry_after = None
+            try:
+                async with self._request_semaphore, self.session.request(
+                        method, url, params=params, json=body, headers=self._headers,
+                        timeout=self._timeout) as response:
+                    if response.status == 429:
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    response.raise_for_status()
+                    result = await response.json()
+            except aiohttp.ClientResponseError as error:
+                if error.status != 429 and error.status < 500:
+                    # The API answered; retrying a bad request or key will not help.
+                    if breaker is not None:
+                        breaker.record_success()
+                    raise
+                failure: Exception = error
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+                failure = error
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return result
+
+            if breaker is not None:
+                breaker.record_failure()
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            if attempt >= MAX_RETRIES or delay > RETRY_MAX_DELAY or (breaker is not None and breaker.is_open):
+                raise failure
+            attempt += 1
+            record_retry()
+            _LOGGER.debug(f"Retrying {url} in {delay:.1f}s after: {failure!r}")
+            await asyncio.sleep(delay)
+
+    async def test_api_key(self) -> None:
         try:
-            response = self.session.get(f"{BASE_NAVI_URL}/directions", params={
+            await self._get(f"{BASE_NAVI_URL}/directions", {
                 "origin": "127.0,37.0",
                 "destination": "127.1,37.1"
             })
-            response.raise_for_status()
-        except requests.RequestException as error:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
             raise HomeAssistantError(f"Failed to validate API key: {error}") from error
 
-    def _address_to_coord(self, address: str) -> str:
+    async def _address_to_coord(self, address: str) -> str:
+        if is_coordinates(address):
+            return normalize_coords(address)
+        if self.geocode_cache is not None:
+            cached = self.geocode_cache.get(address, self.geocode_cache_ttl)
+            record_cache_lookup(cached is not None)
+            if cached is not None:
+                return cached
         try:
-            response = self.session.get(BASE_LOCAL_URL, params={"query": address})
-            response.raise_for_status()
-            result = response.json()
+            # Routes sharing an address geocode it once even when they refresh together.
+            # A geocode cache lookup was already counted above.
+            result = await self._cached_get(BASE_LOCAL_URL, {"query": normalize_address(address)},
+                                            record_lookup=self.geocode_cache is None)
             if result["documents"]:
                 x = result["documents"][0]["x"]
                 y = result["documents"][0]["y"]
-                return f"{x},{y}"
-            raise ValueError(f"No coordinates found for address: {address}")
-        except requests.RequestException as error:
+                coord = f"{x},{y}"
+                if self.geocode_cache is not None:
+                    self.geocode_cache.set(address, coord)
+                return coord
+            raise HomeAssistantError(f"No coordinates found for address: {address}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
             raise HomeAssistantError(f"Failed to convert address to coordinates: {error}") from error
 
-    def direction(self, start: str, end: str, waypoint: Optional[str] = None, priority: str = PRIORITY_RECOMMEND) -> Dict[str, Any]:
+    async def validate_addresses(self, addresses: Iterable[str],
+                                 max_concurrent: int = VALIDATION_MAX_CONCURRENT_REQUESTS) -> Dict[str, str]:
+        """Geocode addresses concurrently; return an error message for each one that failed."""
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def _validate(address: str) -> Optional[str]:
+            async with semaphore:
+                try:
+                    await self._address_to_coord(address)
+                except (HomeAssistantError, KeyError) as error:
+                    return str(error)
+            return None
+
+        unique = list(dict.fromkeys(addresses))
+        results = await asyncio.gather(*(_validate(address) for address in unique))
+        return {address: error for address, error in zip(unique, results) if error is not None}
+
+    async def resolve_route(self, start: str, end: str, waypoint: Optional[str] = None,
+                            priority: Optional[str] = PRIORITY_RECOMMEND) -> Dict[str, str]:
+        """Geocode a route once into the query parameters shared by both directions endpoints."""
+        addresses = [start, end] + ([waypoint] if waypoint else [])
+        coords = await asyncio.gather(*(self._address_to_coord(address) for address in addresses))
+        params = {
+            "origin": coords[0],
+            "destination": coords[1],
+            "priority": priority or PRIORITY_RECOMMEND
+        }
+        if waypoint:
+            params["waypoints"] = coords[2]
+        return params
+
+    async def _cached_get(self, url: str, params: Dict[str, str], record_lookup: bool = True) -> Dict[str, Any]:
+        """GET through the response cache; identical concurrent queries share one request."""
+        return await self.response_cache.async_fetch(
+            ResponseCache.make_key(url, params), lambda: self._get(url, params), record_lookup)
+
+    async def direction_from_params(self, params: Dict[str, str]) -> Dict[str, Any]:
         try:
-            start_coord = self._address_to_coord(start)
-            end_coord = self._address_to_coord(end)
-            params = {
-                "origin": start_coord,
-                "destination": end_coord,
-                "priority": priority
-            }
-            if waypoint:
-                params["waypoints"] = self._address_to_coord(waypoint)
-
-            response = self.session.get(f"{BASE_NAVI_URL}/directions", params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as error:
+            return await self._cached_get(f"{BASE_NAVI_URL}/directions", params)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
             raise HomeAssistantError(f"Failed to get directions: {error}") from error
 
-    def future_direction(self, start: str, end: str, waypoint: Optional[str] = None,
-                         departure_time: Optional[str] = None, priority: str = PRIORITY_RECOMMEND) -> Dict[str, Any]:
+    async def future_direction_from_params(self, params: Dict[str, str],
+                                           departure_time: Optional[str] = None) -> Dict[str, Any]:
+        if departure_time:
+            params = {**params, "departure_time": departure_time}
         try:
-            start_coord = self._address_to_coord(start)
-            end_coord = self._address_to_coord(end)
-            params = {
-                "origin": start_coord,
-                "destination": end_coord,
-                "priority": priority
-            }
-            if waypoint:
-                params["waypoints"] = self._address_to_coord(waypoint)
-            if departure_time:
-                params["departure_time"] = departure_time
-
-            response = self.session.get(f"{BASE_NAVI_URL}/future/directions", params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as error:
+            return await self._cached_get(f"{BASE_NAVI_URL}/future/directions", params)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
             raise HomeAssistantError(f"Failed to get future directions: {error}") from error
+
+    async def resolve_points(self, addresses: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+        """Geocode named addresses into the {x, y} points taken by the multi-route endpoints."""
+        names = list(addresses)
+        coords = await asyncio.gather(*(self._address_to_coord(addresses[name]) for name in names))
+        points = {}
+        for name, coord in zip(names, coords):
+            x, y = coord.split(",")
+            points[name] = {"x": x, "y": y}
+        return points
+
+    async def destinations_directions(self, origin: Dict[str, str], destinations: Dict[str, Dict[str, str]],
+                                      radius: int, priority: str) -> Dict[str, Any]:
+        """Summaries from one origin to up to 30 destinations, each answered under its name as key."""
+        return await self._matrix_post(f"{BASE_NAVI_URL}/destinations/directions", {
+            "origin": origin,
+            "destinations": [{**point, "key": name} for name, point in destinations.items()],
+            "radius": radius,
+            "priority": priority,
+        })
+
+    async def origins_directions(self, origins: Dict[str, Dict[str, str]], destination: Dict[str, str],
+                                 radius: int, priority: str) -> Dict[str, Any]:
+        """Summaries from up to 30 origins to one destination, each answered under its name as key."""
+        return await self._matrix_post(f"{BASE_NAVI_URL}/origins/directions", {
+            "origins": [{**point, "key": name} for name, point in origins.items()],
+            "destination": destination,
+            "radius": radius,
+            "priority": priority,
+        })
+
+    async def _matrix_post(self, url: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return await self.response_cache.async_fetch(
+                (url, json.dumps(body, sort_keys=True)), lambda: self._post(url, body))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            raise HomeAssistantError(f"Failed to get multi-route directions: {error}") from error
+
+    async def direction(self, start: str, end: str, waypoint: Optional[str] = None, priority: str = PRIORITY_RECOMMEND) -> Dict[str, Any]:
+        params = await self.resolve_route(start, end, waypoint, priority)
+        return await self.direction_from_params(params)
+
+    async def future_direction(self, start: str, end: str, waypoint: Optional[str] = None,
+                               departure_time: Optional[str] = None, priority: str = PRIORITY_RECOMMEND) -> Dict[str, Any]:
+        params = await self.resolve_route(start, end, waypoint, priority)
+        return await self.future_direction_from_params(params, departure_time)
@@ -0,0 +1,215 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+import asyncio
+import logging
+import time
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from .metrics import record_cache_lookup
+from .const import (
+    DOMAIN,
+    DATA_GEOCODE_CACHE,
+    DATA_RESPONSE_CACHE,
+    GEOCODE_CACHE_MAX_SIZE,
+    GEOCODE_CACHE_SAVE_DELAY,
+    GEOCODE_CACHE_STORAGE_KEY,
+    GEOCODE_CACHE_STORAGE_VERSION,
+    RESPONSE_CACHE_MAX_SIZE,
+    RESPONSE_CACHE_TTL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def normalize_address(address: str) -> str:
+    """Collapse whitespace and case so equivalent addresses share a cache key."""
+    return " ".join(address.split()).casefold()
+
+
+class GeocodeCache:
+    """LRU cache of address -> "x,y" coordinates, persisted through Store.
+
+    Entries carry the time they were geocoded; the maximum age is supplied by
+    the caller so that every config entry can apply its own TTL to the shared
+    cache.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_size: int = GEOCODE_CACHE_MAX_SIZE) -> None:
+        self.hass = hass
+        self.max_size = max_size
+        self._store: Store = Store(hass, GEOCODE_CACHE_STORAGE_VERSION, GEOCODE_CACHE_STORAGE_KEY)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        for key, entry in stored.get("entries", {}).items():
+            try:
+                coord, geocoded_at = entry
+                self._entries[key] = (str(coord), float(geocoded_at))
+            except (TypeError, ValueError):
+                _LOGGER.warning(f"Discarding unreadable geocode cache entry for {key}")
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, address: str, ttl: Optional[float] = None) -> Optional[str]:
+        key = normalize_address(address)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        coord, geocoded_at = entry
+        if ttl is not None and time.time() - geocoded_at > ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return coord
+
+    def set(self, address: str, coord: str) -> None:
+        key = normalize_address(address)
+        self._entries[key] = (coord, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        self._schedule_save()
+
+    def invalidate(self, addresses: Iterable[Optional[str]]) -> None:
+        removed = False
+        for address in addresses:
+            if address and self._entries.pop(normalize_address(address), None) is not None:
+                removed = True
+        if removed:
+            self._schedule_save()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, GEOCODE_CACHE_SAVE_DELAY)
+
+    def _data_to_save(self) -> Dict[str, Any]:
+        return {"entries": {key: list(value) for key, value in self._entries.items()}}
+
+
+def normalize_coords(value: str) -> str:
+    """Format "x,y" (or "x,y|x,y" waypoint lists) with fixed precision."""
+    try:
+        return "|".join(
+            ",".join(f"{float(part):.6f}" for part in point.split(","))
+            for point in value.split("|")
+        )
+    except ValueError:
+        return value
+
+
+def is_coordinates(value: str) -> bool:
+    """Whether value is already an "x,y" point rather than an address to geocode."""
+    parts = value.split(",")
+    if len(parts) != 2:
+        return False
+    try:
+        float(parts[0])
+        float(parts[1])
+    except ValueError:
+        return False
+    return True
+
+
+class ResponseCache:
+    """Short-lived in-memory cache of API responses keyed by request parameters.
+
+    Concurrent requests for the same key are coalesced: the first caller
+    starts the request and every other caller awaits the same result.
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_size: int = RESPONSE_CACHE_MAX_SIZE) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, str]) -> Hashable:
+        return endpoint, tuple(sorted(
+            (name, normalize_coords(value) if name in ("origin", "destination", "waypoints") else value)
+            for name, value in params.items()
+        ))
+
+    async def async_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                          record_lookup: bool = True) -> Any:
+        """Return the cached response for key, fetching it once when missing.
+
+        record_lookup=False leaves the lookup out of the route metrics, for
+        callers that already counted it against a cache of their own.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            if record_lookup:
+                record_cache_lookup(True)
+            return cached
+        task = self._in_flight.get(key)
+        # Joining a request that is already in flight costs no HTTP call either.
+        if record_lookup:
+            record_cache_lookup(task is not None)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._fetch_done(key, done))
+        # Shield the shared request so one caller giving up does not cancel it for the others.
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _fetch_done(self, key: Hashable, task: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result())
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        self._entries[key] = (value, now)
+        self._entries.move_to_end(key)
+        # Entries are kept in the order they were stored, so the expired ones are all at the front.
+        # Forecast keys carry their departure time and are never looked up again to expire on read.
+        while self._entries:
+            _, stored_at = next(iter(self._entries.values()))
+            if now - stored_at <= self.ttl:
+                break
+            self._entries.popitem(last=False)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+async def async_get_geocode_cache(hass: HomeAssistant) -> GeocodeCache:
+    """Return the geocode cache shared by every Kakao Navi config entry."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    cache = domain_data.get(DATA_GEOCODE_CACHE)
+    if cache is None:
+        cache = GeocodeCache(hass)
+        await cache.async_load()
+        cache = domain_data.setdefault(DATA_GEOCODE_CACHE, cache)
+    return cache
+
+
+@callback
+def async_get_response_cache(hass: HomeAssistant) -> ResponseCache:
+    """Return the response cache shared by every Kakao Navi config entry."""
+    return hass.data.setdefault(DOMAIN, {}).setdefault(DATA_RESPONSE_CACHE, ResponseCache())
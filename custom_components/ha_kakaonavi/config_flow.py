@@ -1,14 +1,59 @@
+import logging
 from homeassistant import config_entries
 from homeassistant.core import callback
+from homeassistant.helpers.selector import (
+    EntitySelector, EntitySelectorConfig, TextSelector, TextSelectorConfig,
+)
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
 import voluptuous as vol
 from datetime import timedelta
 from .const import (
     DOMAIN, CONF_APIKEY, CONF_ROUTE_NAME, CONF_START, CONF_END, CONF_WAYPOINT,
     CONF_PRIORITY, PRIORITY_OPTIONS, PRIORITY_RECOMMEND,
     CONF_UPDATE_INTERVAL, CONF_FUTURE_UPDATE_INTERVAL,
-    DEFAULT_UPDATE_INTERVAL, DEFAULT_FUTURE_UPDATE_INTERVAL, CONF_ROUTES
+    DEFAULT_UPDATE_INTERVAL, DEFAULT_FUTURE_UPDATE_INTERVAL, CONF_ROUTES,
+    CONF_GEOCODE_CACHE_TTL, DEFAULT_GEOCODE_CACHE_TTL, DATA_GEOCODE_CACHE,
+    CONF_ADAPTIVE_POLLING, CONF_ACTIVE_HOURS_START, CONF_ACTIVE_HOURS_END, DEFAULT_ADAPTIVE_POLLING,
+    CONF_KEEP_RAW_RESPONSE, DEFAULT_KEEP_RAW_RESPONSE,
+    CONF_FORECAST_HORIZONS, DEFAULT_FORECAST_HORIZONS,
+    CONF_ROUTE_TYPE, ROUTE_TYPE_MATRIX, CONF_MATRIX_DIRECTION, MATRIX_DIRECTIONS, MATRIX_ONE_TO_MANY,
+    CONF_LOCATION, CONF_TARGETS, CONF_TARGET_NAME, CONF_TARGET_ADDRESS, CONF_RADIUS,
+    DEFAULT_MATRIX_RADIUS, MAX_MATRIX_RADIUS, MAX_MATRIX_TARGETS, MATRIX_PRIORITY_OPTIONS, PRIORITY_TIME,
+    CONF_ACTIVATION_ENTITIES, CONF_ACTIVATION_ZONE, ACTIVATION_ENTITY_DOMAINS,
+    CONF_INACTIVE_INTERVAL, DEFAULT_INACTIVE_INTERVAL, CONF_CALENDAR_LEAD, DEFAULT_CALENDAR_LEAD
 )
 from .api import KakaoNaviApiClient
+from .cache import async_get_geocode_cache
+from .coordinator import parse_forecast_horizons
+from .routes import async_update_entry_routes, async_validate_routes, merge_routes
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Demand-driven polling settings of a route, shared by the route forms.
+DEMAND_SCHEMA = {
+    vol.Optional(CONF_ACTIVATION_ENTITIES): EntitySelector(
+        EntitySelectorConfig(domain=ACTIVATION_ENTITY_DOMAINS, multiple=True)),
+    vol.Optional(CONF_ACTIVATION_ZONE): EntitySelector(EntitySelectorConfig(domain="zone")),
+    vol.Optional(CONF_INACTIVE_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=0)),
+}
+
+
+def _parse_targets(text):
+    """Parse one "name: address" per line into matrix route targets."""
+    targets = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        name, separator, address = line.partition(":")
+        if not separator or not name.strip() or not address.strip():
+            raise ValueError(f"Expected 'name: address', got {line!r}")
+        targets.append({CONF_TARGET_NAME: name.strip(), CONF_TARGET_ADDRESS: address.strip()})
+    names = [target[CONF_TARGET_NAME] for target in targets]
+    if not targets or len(targets) > MAX_MATRIX_TARGETS or len(set(names)) != len(names):
+        raise ValueError(f"Expected 1 to {MAX_MATRIX_TARGETS} targets with unique names")
+    return targets
 
 
 class KakaoNaviConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -18,8 +63,8 @@ class KakaoNaviConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
         if user_input is not None:
             try:
-                client = KakaoNaviApiClient(user_input[CONF_APIKEY])
-                await self.hass.async_add_executor_job(client.test_api_key)
+                client = KakaoNaviApiClient(user_input[CONF_APIKEY], async_get_clientsession(self.hass))
+                await client.test_api_key()
                 await self.async_set_unique_id(f"{user_input[CONF_APIKEY]}_{user_input[CONF_ROUTE_NAME]}")
                 self._abort_if_unique_id_configured()
 
@@ -56,6 +101,41 @@ class KakaoNaviConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def async_step_import(self, import_data):
+        """Add or update the routes given in YAML, in the entry using the same API key."""
+        client = KakaoNaviApiClient(import_data[CONF_APIKEY], async_get_clientsession(self.hass),
+                                    geocode_cache=await async_get_geocode_cache(self.hass))
+        routes = import_data[CONF_ROUTES]
+        errors = await async_validate_routes(client, routes)
+        if errors:
+            for route_name, error in errors.items():
+                _LOGGER.error(f"Not importing Kakao Navi routes from YAML, route {route_name} is invalid: {error}")
+            return self.async_abort(reason="invalid_routes")
+
+        entry = next((entry for entry in self._async_current_entries()
+                      if entry.data.get(CONF_APIKEY) == import_data[CONF_APIKEY]), None)
+        if entry is not None:
+            await async_update_entry_routes(self.hass, entry, merge_routes(entry.options.get(CONF_ROUTES, []), routes))
+            return self.async_abort(reason="routes_imported")
+
+        try:
+            await client.test_api_key()
+        except Exception:
+            return self.async_abort(reason="invalid_api_key")
+        await self.async_set_unique_id(f"{import_data[CONF_APIKEY]}_import")
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title="Kakao Navi",
+            data={
+                CONF_APIKEY: import_data[CONF_APIKEY],
+            },
+            options={
+                CONF_ROUTES: routes,
+                CONF_UPDATE_INTERVAL: DEFAULT_UPDATE_INTERVAL,
+                CONF_FUTURE_UPDATE_INTERVAL: DEFAULT_FUTURE_UPDATE_INTERVAL,
+            }
+        )
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -70,6 +150,8 @@ class KakaoNaviOptionsFlow(config_entries.OptionsFlow):
         if user_input is not None:
             if user_input.get("next_step") == "edit_route":
                 return await self.async_step_edit_route()
+            elif user_input.get("next_step") == "matrix_route":
+                return await self.async_step_matrix_route()
             elif user_input.get("next_step") == "update_intervals":
                 return await self.async_step_update_intervals()
 
@@ -78,26 +160,37 @@ class KakaoNaviOptionsFlow(config_entries.OptionsFlow):
             data_schema=vol.Schema({
                 vol.Required("next_step"): vol.In({
                     "edit_route": "Edit Route",
+                    "matrix_route": "Add or Replace Matrix Route",
                     "update_intervals": "Update Intervals"
                 })
             })
         )
 
     async def async_step_update_intervals(self, user_input=None):
+        errors = {}
         if user_input is not None:
+            for key in (CONF_ACTIVE_HOURS_START, CONF_ACTIVE_HOURS_END):
+                if user_input.get(key) and dt_util.parse_time(user_input[key]) is None:
+                    errors[key] = "invalid_time"
+            try:
+                parse_forecast_horizons(user_input[CONF_FORECAST_HORIZONS])
+            except ValueError:
+                errors[CONF_FORECAST_HORIZONS] = "invalid_forecast_horizons"
+
+        if user_input is not None and not errors:
             new_options = dict(self.config_entry.options)
             new_options[CONF_UPDATE_INTERVAL] = user_input[CONF_UPDATE_INTERVAL]
             new_options[CONF_FUTURE_UPDATE_INTERVAL] = user_input[CONF_FUTURE_UPDATE_INTERVAL]
+            new_options[CONF_GEOCODE_CACHE_TTL] = user_input[CONF_GEOCODE_CACHE_TTL]
+            new_options[CONF_ADAPTIVE_POLLING] = user_input[CONF_ADAPTIVE_POLLING]
+            new_options[CONF_ACTIVE_HOURS_START] = user_input.get(CONF_ACTIVE_HOURS_START)
+            new_options[CONF_ACTIVE_HOURS_END] = user_input.get(CONF_ACTIVE_HOURS_END)
+            new_options[CONF_FORECAST_HORIZONS] = user_input[CONF_FORECAST_HORIZONS]
+            new_options[CONF_KEEP_RAW_RESPONSE] = user_input[CONF_KEEP_RAW_RESPONSE]
+            new_options[CONF_INACTIVE_INTERVAL] = user_input[CONF_INACTIVE_INTERVAL]
+            new_options[CONF_CALENDAR_LEAD] = user_input[CONF_CALENDAR_LEAD]
 
-            # Update the coordinator
-            hass = self.hass
-            entry = self.config_entry
-            coordinators = hass.data[DOMAIN][entry.entry_id]
-
-            for coordinator in coordinators.values():
-                coordinator.set_update_interval(user_input[CONF_UPDATE_INTERVAL])
-                coordinator.set_future_update_interval(user_input[CONF_FUTURE_UPDATE_INTERVAL])
-
+            # The update listener applies the new options to the running routes.
             return self.async_create_entry(title="", data=new_options)
 
         options = self.config_entry.options
@@ -110,12 +203,94 @@ class KakaoNaviOptionsFlow(config_entries.OptionsFlow):
                 vol.Required(CONF_FUTURE_UPDATE_INTERVAL,
                              default=options.get(CONF_FUTURE_UPDATE_INTERVAL, DEFAULT_FUTURE_UPDATE_INTERVAL)): vol.All(
                     vol.Coerce(int), vol.Range(min=1)),
+                vol.Required(CONF_FORECAST_HORIZONS,
+                             default=options.get(CONF_FORECAST_HORIZONS, DEFAULT_FORECAST_HORIZONS)): str,
+                vol.Required(CONF_GEOCODE_CACHE_TTL,
+                             default=options.get(CONF_GEOCODE_CACHE_TTL, DEFAULT_GEOCODE_CACHE_TTL)): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)),
+                vol.Required(CONF_ADAPTIVE_POLLING,
+                             default=options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING)): bool,
+                vol.Optional(CONF_ACTIVE_HOURS_START,
+                             description={"suggested_value": options.get(CONF_ACTIVE_HOURS_START)}): str,
+                vol.Optional(CONF_ACTIVE_HOURS_END,
+                             description={"suggested_value": options.get(CONF_ACTIVE_HOURS_END)}): str,
+                vol.Required(CONF_INACTIVE_INTERVAL,
+                             default=options.get(CONF_INACTIVE_INTERVAL, DEFAULT_INACTIVE_INTERVAL)): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)),
+                vol.Required(CONF_CALENDAR_LEAD,
+                             default=options.get(CONF_CALENDAR_LEAD, DEFAULT_CALENDAR_LEAD)): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)),
+                vol.Required(CONF_KEEP_RAW_RESPONSE,
+                             default=options.get(CONF_KEEP_RAW_RESPONSE, DEFAULT_KEEP_RAW_RESPONSE)): bool,
+            }),
+            errors=errors,
+        )
+
+    def _invalidate_geocode_cache(self, *routes):
+        """Drop cached coordinates so edited addresses are geocoded again on the next refresh."""
+        geocode_cache = self.hass.data.get(DOMAIN, {}).get(DATA_GEOCODE_CACHE)
+        if geocode_cache is None:
+            return
+        for route in routes:
+            geocode_cache.invalidate([route.get(CONF_START), route.get(CONF_END), route.get(CONF_WAYPOINT),
+                                      route.get(CONF_LOCATION)])
+            geocode_cache.invalidate([target[CONF_TARGET_ADDRESS] for target in route.get(CONF_TARGETS, [])])
+
+    async def async_step_matrix_route(self, user_input=None):
+        """One origin and many destinations (or the reverse) refreshed with a single request."""
+        errors = {}
+        if user_input is not None:
+            try:
+                targets = _parse_targets(user_input[CONF_TARGETS])
+            except ValueError:
+                errors[CONF_TARGETS] = "invalid_targets"
+
+        if user_input is not None and not errors:
+            route = {
+                CONF_ROUTE_NAME: user_input[CONF_ROUTE_NAME],
+                CONF_ROUTE_TYPE: ROUTE_TYPE_MATRIX,
+                CONF_MATRIX_DIRECTION: user_input[CONF_MATRIX_DIRECTION],
+                CONF_LOCATION: user_input[CONF_LOCATION],
+                CONF_TARGETS: targets,
+                CONF_PRIORITY: user_input[CONF_PRIORITY],
+                CONF_RADIUS: user_input[CONF_RADIUS],
+                **{key: user_input[key] for key in (CONF_ACTIVATION_ENTITIES, CONF_ACTIVATION_ZONE, CONF_INACTIVE_INTERVAL)
+                   if key in user_input},
+            }
+            routes = [dict(existing) for existing in self.config_entry.options.get(CONF_ROUTES, [])]
+            # Entering the name of an existing route replaces it.
+            index = next((i for i, existing in enumerate(routes) if existing[CONF_ROUTE_NAME] == route[CONF_ROUTE_NAME]),
+                         None)
+            if index is not None:
+                self._invalidate_geocode_cache(routes[index], route)
+                routes[index] = route
+            else:
+                self._invalidate_geocode_cache(route)
+                routes.append(route)
+
+            new_options = dict(self.config_entry.options)
+            new_options[CONF_ROUTES] = routes
+            return self.async_create_entry(title="", data=new_options)
+
+        return self.async_show_form(
+            step_id="matrix_route",
+            data_schema=vol.Schema({
+                vol.Required(CONF_ROUTE_NAME): str,
+                vol.Required(CONF_MATRIX_DIRECTION, default=MATRIX_ONE_TO_MANY): vol.In(MATRIX_DIRECTIONS),
+                vol.Required(CONF_LOCATION): str,
+                vol.Required(CONF_TARGETS): TextSelector(TextSelectorConfig(multiline=True)),
+                vol.Required(CONF_PRIORITY, default=PRIORITY_TIME): vol.In(MATRIX_PRIORITY_OPTIONS),
+                vol.Required(CONF_RADIUS, default=DEFAULT_MATRIX_RADIUS): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=MAX_MATRIX_RADIUS)),
+                **DEMAND_SCHEMA,
             }),
+            errors=errors,
         )
 
     async def async_step_edit_route(self, user_input=None):
         errors = {}
-        routes = self.config_entry.options.get(CONF_ROUTES, [])
+        # Copied so the stored options are not changed before the update listener can diff them.
+        routes = [dict(route) for route in self.config_entry.options.get(CONF_ROUTES, [])]
 
         if user_input is not None:
             if "route_to_edit" in user_input:
@@ -123,10 +298,12 @@ class KakaoNaviOptionsFlow(config_entries.OptionsFlow):
                 route_index = next((i for i, route in enumerate(routes) if route[CONF_ROUTE_NAME] == route_to_edit),
                                    None)
                 if route_index is not None:
+                    self._invalidate_geocode_cache(routes[route_index], user_input)
                     routes[route_index] = user_input
                 else:
                     routes.append(user_input)
             else:
+                self._invalidate_geocode_cache(user_input)
                 routes.append(user_input)
 
             new_options = dict(self.config_entry.options)
@@ -145,6 +322,7 @@ class KakaoNaviOptionsFlow(config_entries.OptionsFlow):
                     vol.Required(CONF_END): str,
                     vol.Optional(CONF_WAYPOINT): str,
                     vol.Optional(CONF_PRIORITY, default=PRIORITY_RECOMMEND): vol.In(PRIORITY_OPTIONS),
+                    **DEMAND_SCHEMA,
                 }),
                 errors=errors,
             )
@@ -158,6 +336,7 @@ class KakaoNaviOptionsFlow(config_entries.OptionsFlow):
                 vol.Required(CONF_END): str,
                 vol.Optional(CONF_WAYPOINT): str,
                 vol.Optional(CONF_PRIORITY, default=PRIORITY_RECOMMEND): vol.In(PRIORITY_OPTIONS),
+                **DEMAND_SCHEMA,
             }),
             errors=errors,
         )
\ No newline at end of file
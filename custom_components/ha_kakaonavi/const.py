@@ -1,3 +1,4 @@
+from datetime import timedelta
 from homeassistant.const import (
     CONF_NAME,
     CONF_API_KEY,
@@ -18,12 +19,120 @@ CONF_ROUTE_NAME = CONF_NAME
 DEFAULT_UPDATE_INTERVAL = 10
 DEFAULT_FUTURE_UPDATE_INTERVAL = 60
 MAX_DAILY_CALLS = 5000
+DEFAULT_REQUESTS_PER_SECOND = 5
+MAX_INTERVAL_STRETCH = 8
+DATA_QUOTA_MANAGERS = "quota_managers"
+QUOTA_STORAGE_VERSION = 1
+QUOTA_SAVE_DELAY = 60  # seconds
+DEFAULT_REQUEST_TIMEOUT = 10  # seconds
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1  # seconds
+RETRY_MAX_DELAY = 30  # seconds
+DATA_CIRCUIT_BREAKERS = "circuit_breakers"
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 120  # seconds
+STALE_DATA_MAX_AGE = timedelta(hours=1)
+ROUTE_DATA_STORAGE_VERSION = 1
+ROUTE_DATA_SAVE_DELAY = 30  # seconds
+RESTORED_DATA_MAX_AGE = timedelta(hours=6)
+
+HISTORY_CAPACITY = 4032  # samples per route, two weeks at 5 minute polling
+HISTORY_SLOT_MINUTES = 30
+HISTORY_STORAGE_VERSION = 1
+HISTORY_SAVE_DELAY = 300  # seconds
+HISTORY_MIN_SAMPLES = 3  # per slot before its statistics are trusted
+HISTORY_STABLE_SPREAD = 0.1  # p10 to p90 spread, relative to the median
+HISTORY_STABLE_STRETCH = 2
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4  # HTTP requests in flight per API client
+SCHEDULER_TICK = timedelta(seconds=15)
+FAILED_REFRESH_RETRY_DELAY = timedelta(minutes=1)
+
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_ACTIVE_HOURS_START = "active_hours_start"
+CONF_ACTIVE_HOURS_END = "active_hours_end"
+DEFAULT_ADAPTIVE_POLLING = False
+ADAPTIVE_SAMPLE_SIZE = 6
+ADAPTIVE_VOLATILE_CHANGE = 0.05  # relative ETA change between polls
+ADAPTIVE_STABLE_CHANGE = 0.01
+ADAPTIVE_SPEED_UP = 0.5
+ADAPTIVE_BACK_OFF = 1.5
+ADAPTIVE_MIN_INTERVAL = timedelta(minutes=2)
+ADAPTIVE_MAX_INTERVAL = timedelta(minutes=60)
+
+CONF_FORECAST_HORIZONS = "forecast_horizons"
+DEFAULT_FORECAST_HORIZON = 30  # minutes; the cadence of other horizons scales from it
+DEFAULT_FORECAST_HORIZONS = "30"
+MAX_FORECAST_HORIZONS = 6
+MAX_FORECAST_HORIZON = 1440  # minutes
+
+CONF_ACTIVATION_ENTITIES = "activation_entities"
+CONF_ACTIVATION_ZONE = "activation_zone"
+DEFAULT_ACTIVATION_ZONE = "zone.home"
+CONF_INACTIVE_INTERVAL = "inactive_interval"
+DEFAULT_INACTIVE_INTERVAL = 0  # minutes, 0 pauses the route while it is inactive
+CONF_CALENDAR_LEAD = "calendar_lead"
+DEFAULT_CALENDAR_LEAD = 60  # minutes before an event starts
+ACTIVATION_ENTITY_DOMAINS = ["person", "device_tracker", "calendar", "input_boolean", "binary_sensor"]
+LOCATION_ENTITY_DOMAINS = ["person", "device_tracker", "zone"]
+LOCATION_GRID = 0.002  # degrees, roughly 200 m
+
+CONF_KEEP_RAW_RESPONSE = "keep_raw_response"
+DEFAULT_KEEP_RAW_RESPONSE = False
+
+CONF_GEOCODE_CACHE_TTL = "geocode_cache_ttl"
+DEFAULT_GEOCODE_CACHE_TTL = 30  # days
+DATA_GEOCODE_CACHE = "geocode_cache"
+GEOCODE_CACHE_STORAGE_KEY = f"{DOMAIN}.geocode_cache"
+GEOCODE_CACHE_STORAGE_VERSION = 1
+GEOCODE_CACHE_MAX_SIZE = 512
+GEOCODE_CACHE_SAVE_DELAY = 30  # seconds
+DATA_RESPONSE_CACHE = "response_cache"
+RESPONSE_CACHE_TTL = 120  # seconds
+RESPONSE_CACHE_MAX_SIZE = 256
+
+METRICS_WINDOW = 100  # samples per rolling histogram
+METRICS_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000)
+
+SERVICE_FIND_OPTIMAL_DEPARTURE_TIME = "find_optimal_departure_time"
+ATTR_SENSOR_NAME = "sensor_name"
+ATTR_START_TIME = "start_time"
+ATTR_END_TIME = "end_time"
+ATTR_INTERVAL = "interval"
+DEFAULT_SWEEP_INTERVAL = 30  # minutes
+MIN_SWEEP_INTERVAL = 5  # minutes
+MAX_SWEEP_SLOTS = 100
+SWEEP_MAX_CONCURRENT_REQUESTS = 4
+
+SERVICE_MANAGE_ROUTES = "manage_routes"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_ROUTES = "routes"
+ATTR_REMOVE = "remove"
+VALIDATION_MAX_CONCURRENT_REQUESTS = 8
 
 CONF_PRIORITY = "priority"
 PRIORITY_RECOMMEND = "RECOMMEND"
 PRIORITY_TIME = "TIME"
 PRIORITY_DISTANCE = "DISTANCE"
 PRIORITY_OPTIONS = [PRIORITY_RECOMMEND, PRIORITY_TIME, PRIORITY_DISTANCE]
+# The multi-origin and multi-destination endpoints only rank by time or distance.
+MATRIX_PRIORITY_OPTIONS = [PRIORITY_TIME, PRIORITY_DISTANCE]
+
+CONF_ROUTE_TYPE = "route_type"
+ROUTE_TYPE_SINGLE = "single"
+ROUTE_TYPE_MATRIX = "matrix"
+CONF_MATRIX_DIRECTION = "matrix_direction"
+MATRIX_ONE_TO_MANY = "one_to_many"
+MATRIX_MANY_TO_ONE = "many_to_one"
+MATRIX_DIRECTIONS = [MATRIX_ONE_TO_MANY, MATRIX_MANY_TO_ONE]
+CONF_LOCATION = "location"
+CONF_TARGETS = "targets"
+CONF_TARGET_NAME = "name"
+CONF_TARGET_ADDRESS = "address"
+CONF_RADIUS = "radius"
+DEFAULT_MATRIX_RADIUS = 10000  # meters
+MAX_MATRIX_RADIUS = 10000  # meters, the API's limit
+MAX_MATRIX_TARGETS = 30
 
 # Add these new constants
 UNIT_OF_TIME = UnitOfTime.MINUTES
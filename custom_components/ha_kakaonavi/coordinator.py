@@ -1,95 +1,477 @@
-from typing import Any, Dict
-from datetime import timedelta
+from typing import Any, Deque, Dict, List, Mapping, Optional
+from collections import deque
+from dataclasses import replace
+import asyncio
+from datetime import datetime, time, timedelta
 import logging
+from time import monotonic
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
 from .api import KakaoNaviApiClient
+from .demand import RouteDemand, entity_location, is_location_entity
+from .history import KakaoNaviHistoryStore
+from .metrics import CURRENT_ROUTE_METRICS, RouteMetrics
+from .models import KakaoNaviRouteData, RouteSummary
+from .storage import KakaoNaviRouteDataStore
 from .const import (
     CONF_UPDATE_INTERVAL, CONF_FUTURE_UPDATE_INTERVAL,
     DEFAULT_UPDATE_INTERVAL, DEFAULT_FUTURE_UPDATE_INTERVAL,
     CONF_ROUTE_NAME, CONF_START, CONF_END, CONF_WAYPOINT, CONF_PRIORITY,
-    MAX_DAILY_CALLS
+    CONF_ROUTE_TYPE, ROUTE_TYPE_SINGLE, ROUTE_TYPE_MATRIX, CONF_MATRIX_DIRECTION, MATRIX_MANY_TO_ONE, CONF_LOCATION, CONF_TARGETS, CONF_TARGET_NAME,
+    CONF_TARGET_ADDRESS, CONF_RADIUS, DEFAULT_MATRIX_RADIUS, PRIORITY_TIME,
+    CONF_ADAPTIVE_POLLING, CONF_ACTIVE_HOURS_START, CONF_ACTIVE_HOURS_END, DEFAULT_ADAPTIVE_POLLING,
+    ADAPTIVE_SAMPLE_SIZE, ADAPTIVE_VOLATILE_CHANGE, ADAPTIVE_STABLE_CHANGE,
+    ADAPTIVE_SPEED_UP, ADAPTIVE_BACK_OFF, ADAPTIVE_MIN_INTERVAL, ADAPTIVE_MAX_INTERVAL,
+    CONF_KEEP_RAW_RESPONSE, DEFAULT_KEEP_RAW_RESPONSE, STALE_DATA_MAX_AGE,
+    CONF_FORECAST_HORIZONS, DEFAULT_FORECAST_HORIZON, DEFAULT_FORECAST_HORIZONS,
+    MAX_FORECAST_HORIZONS, MAX_FORECAST_HORIZON,
+    HISTORY_MIN_SAMPLES, HISTORY_STABLE_SPREAD, HISTORY_STABLE_STRETCH,
+    CONF_ACTIVATION_ENTITIES, CONF_ACTIVATION_ZONE, DEFAULT_ACTIVATION_ZONE,
+    CONF_INACTIVE_INTERVAL, DEFAULT_INACTIVE_INTERVAL, CONF_CALENDAR_LEAD, DEFAULT_CALENDAR_LEAD
 )
 
 _LOGGER = logging.getLogger(__name__)
 
-class KakaoNaviDataUpdateCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
+class KakaoNaviDataUpdateCoordinator(DataUpdateCoordinator[KakaoNaviRouteData]):
     def __init__(
         self,
         hass: HomeAssistant,
         client: KakaoNaviApiClient,
-        route: Dict[str, Any]
+        route: Dict[str, Any],
+        options: Optional[Mapping[str, Any]] = None,
+        data_store: Optional[KakaoNaviRouteDataStore] = None,
+        history_store: Optional[KakaoNaviHistoryStore] = None
     ) -> None:
         self.route = route
         self.client = client
-        self._update_interval = timedelta(minutes=route.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL))
-        self._future_update_interval = timedelta(minutes=route.get(CONF_FUTURE_UPDATE_INTERVAL, DEFAULT_FUTURE_UPDATE_INTERVAL))
-        self.last_future_update: Any = None
-        self.api_calls_today = 0
-        self.last_call_date = dt_util.now().date()
+        self.data_store = data_store
+        self.history_store = history_store
+        self.history = history_store.get(route[CONF_ROUTE_NAME]) if history_store is not None else None
+        self._last_forecast_update: Dict[int, datetime] = {}
+        self._eta_samples: Deque[float] = deque(maxlen=ADAPTIVE_SAMPLE_SIZE)
+        activation_entities = route.get(CONF_ACTIVATION_ENTITIES) or []
+        self.demand = RouteDemand(
+            hass,
+            activation_entities,
+            route.get(CONF_ACTIVATION_ZONE) or DEFAULT_ACTIVATION_ZONE,
+        ) if activation_entities else None
+        self._raw: Dict[str, Any] = {}
+        self._base_update_interval: Optional[timedelta] = None
+        self.apply_options(options or {})
+        self.metrics = RouteMetrics()
 
         super().__init__(
             hass,
             _LOGGER,
             name=f"KakaoNavi_{route.get(CONF_ROUTE_NAME, 'Unknown')}",
             update_method=self._async_update_data,
-            update_interval=self._update_interval,
+            # Refreshes are driven by the entry's KakaoNaviRouteScheduler.
+            update_interval=None,
         )
 
-    async def _async_update_data(self) -> Dict[str, Any]:
+    def apply_options(self, options: Mapping[str, Any]) -> None:
+        """Read the entry-wide options (overridden by route-level settings) without touching data or state."""
+        route = self.route
+        update_interval = timedelta(minutes=route.get(
+            CONF_UPDATE_INTERVAL, options.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)))
+        if update_interval != self._base_update_interval:
+            # Adaptive polling starts over from the new base interval.
+            self._adaptive_interval = update_interval
+        self._base_update_interval = update_interval
+        self._future_update_interval = timedelta(minutes=route.get(
+            CONF_FUTURE_UPDATE_INTERVAL, options.get(CONF_FUTURE_UPDATE_INTERVAL, DEFAULT_FUTURE_UPDATE_INTERVAL)))
+        self.forecast_horizons = parse_forecast_horizons(
+            route.get(CONF_FORECAST_HORIZONS, options.get(CONF_FORECAST_HORIZONS, DEFAULT_FORECAST_HORIZONS)))
+        self._primary_horizon = (DEFAULT_FORECAST_HORIZON if DEFAULT_FORECAST_HORIZON in self.forecast_horizons
+                                 else self.forecast_horizons[0])
+        self.adaptive_polling = options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING)
+        self._active_hours_start = _parse_time(options.get(CONF_ACTIVE_HOURS_START))
+        self._active_hours_end = _parse_time(options.get(CONF_ACTIVE_HOURS_END))
+        if self.demand is not None:
+            self.demand.calendar_lead = timedelta(minutes=route.get(
+                CONF_CALENDAR_LEAD, options.get(CONF_CALENDAR_LEAD, DEFAULT_CALENDAR_LEAD)))
+        inactive_interval = route.get(CONF_INACTIVE_INTERVAL, options.get(CONF_INACTIVE_INTERVAL, DEFAULT_INACTIVE_INTERVAL))
+        # None pauses the route while none of its activation entities is active.
+        self.inactive_interval = timedelta(minutes=inactive_interval) if inactive_interval else None
+        self.keep_raw_response = options.get(CONF_KEEP_RAW_RESPONSE, DEFAULT_KEEP_RAW_RESPONSE)
+        if not self.keep_raw_response:
+            self._raw = {}
+
+    @property
+    def refresh_interval(self) -> timedelta:
+        """How long the scheduler waits between refreshes of this route."""
+        interval = self._adaptive_interval if self.adaptive_polling else self._base_update_interval
+        if not self._in_active_hours(dt_util.now()):
+            interval = max(interval, ADAPTIVE_MAX_INTERVAL)
+        if not self.is_active and self.inactive_interval is not None:
+            interval = max(interval, self.inactive_interval)
+        if self.client.quota is None:
+            return interval
+        multiplier = self.client.quota.interval_multiplier
+        if multiplier > 1 and self._history_is_stable(dt_util.now()):
+            # A live poll tells little when this slot's ETA barely varies, so
+            # spend the scarce budget on routes whose traffic is less predictable.
+            multiplier *= HISTORY_STABLE_STRETCH
+        # Stretch polling across every route of the key when the daily budget runs low.
+        return interval * multiplier
+
+    @property
+    def is_active(self) -> bool:
+        """Whether the route is wanted right now; always true without activation entities."""
+        return self.demand is None or self.demand.is_active
+
+    @property
+    def is_paused(self) -> bool:
+        return not self.is_active and self.inactive_interval is None
+
+    def resolve_location(self, value: Optional[str]) -> Optional[str]:
+        """Swap a person, device tracker or zone entity for its current, grid-snapped coordinates."""
+        if not is_location_entity(value):
+            return value
+        location = entity_location(self.hass, value)
+        if location is None:
+            raise UpdateFailed(f"The location of {value} is unknown")
+        return location
+
+    def typical_eta(self, when: datetime) -> Optional[int]:
+        """Median duration in seconds seen around this weekday and time, if known well enough."""
+        if self.history is None:
+            return None
+        stats = self.history.stats(when)
+        if stats is None or stats.count < HISTORY_MIN_SAMPLES:
+            return None
+        return stats.median
+
+    def _history_is_stable(self, now: datetime) -> bool:
+        if self.history is None:
+            return False
+        stats = self.history.stats(now)
+        if stats is None or stats.count < HISTORY_MIN_SAMPLES or stats.median <= 0:
+            return False
+        return (stats.p90 - stats.p10) / stats.median <= HISTORY_STABLE_SPREAD
+
+    def _in_active_hours(self, now: datetime) -> bool:
+        if self._active_hours_start is None or self._active_hours_end is None:
+            return True
+        current = now.time()
+        if self._active_hours_start <= self._active_hours_end:
+            return self._active_hours_start <= current < self._active_hours_end
+        # The window wraps past midnight, e.g. 22:00-02:00.
+        return current >= self._active_hours_start or current < self._active_hours_end
+
+    def _record_eta(self, current: Optional[RouteSummary]) -> None:
+        """Poll faster while the ETA moves between polls and back off while it holds steady."""
+        if current is None:
+            return
+        self._eta_samples.append(float(current.duration))
+        if not self.adaptive_polling or len(self._eta_samples) < 2:
+            return
+
+        samples = list(self._eta_samples)
+        changes = [abs(new - old) / old for old, new in zip(samples, samples[1:]) if old > 0]
+        if not changes:
+            return
+        volatility = sum(changes) / len(changes)
+        if volatility >= ADAPTIVE_VOLATILE_CHANGE:
+            interval = self._adaptive_interval * ADAPTIVE_SPEED_UP
+        elif volatility <= ADAPTIVE_STABLE_CHANGE:
+            interval = self._adaptive_interval * ADAPTIVE_BACK_OFF
+        else:
+            # Drift back towards the configured interval.
+            interval = (self._adaptive_interval + self._base_update_interval) / 2
+        self._adaptive_interval = min(max(interval, ADAPTIVE_MIN_INTERVAL), ADAPTIVE_MAX_INTERVAL)
+
+    async def _async_update_data(self) -> KakaoNaviRouteData:
+        # Lets the shared API client attribute cache hits and retries to this route.
+        token = CURRENT_ROUTE_METRICS.set(self.metrics)
+        started = monotonic()
         try:
-            now = dt_util.now()
-            if now.date() != self.last_call_date:
-                self.api_calls_today = 0
-                self.last_call_date = now.date()
+            data = await self._async_fetch_route()
+            if self.data_store is not None:
+                self.data_store.async_save_route(self.route[CONF_ROUTE_NAME], data)
+            return data
+        except UpdateFailed as err:
+            self.metrics.errors += 1
+            stale = self._stale_data()
+            if stale is not None:
+                # Keep entities available on the last good values while the API recovers.
+                _LOGGER.warning(f"{err}; serving the last good data for route {self.route[CONF_ROUTE_NAME]}")
+                return stale
+            predicted = self._predicted_data()
+            if predicted is None:
+                raise
+            _LOGGER.warning(f"{err}; serving the typical ETA from history for route {self.route[CONF_ROUTE_NAME]}")
+            return predicted
+        finally:
+            self.metrics.refresh.record(monotonic() - started)
+            CURRENT_ROUTE_METRICS.reset(token)
 
-            if self.api_calls_today >= MAX_DAILY_CALLS:
-                raise UpdateFailed(f"Daily API call limit ({MAX_DAILY_CALLS}) reached for route: {self.route[CONF_ROUTE_NAME]}")
+    def restore(self, data: KakaoNaviRouteData) -> None:
+        """Seed the coordinator with data saved before a restart."""
+        self.data = data
+        for horizon, forecast in data.forecasts.items():
+            # A saved forecast is still good for the rest of its interval.
+            self._last_forecast_update[horizon] = forecast.fetched_at
+        if data.current is not None:
+            self._eta_samples.append(float(data.current.duration))
 
-            current_data = await self._get_current_data()
-            future_data = await self._get_future_data()
+    @property
+    def last_fetched(self) -> Optional[datetime]:
+        return self.data.fetched_at if self.data is not None else None
 
-            if current_data is None or future_data is None:
-                raise UpdateFailed(f"Failed to fetch data from Kakao Navi API for route: {self.route[CONF_ROUTE_NAME]}")
+    @property
+    def refresh_failed(self) -> bool:
+        """Whether the last refresh failed, even if stale data is being served."""
+        return not self.last_update_success or (self.data is not None and self.data.stale)
 
-            self.api_calls_today += 2  # Increment by 2 as we make two API calls
+    def _stale_data(self) -> Optional[KakaoNaviRouteData]:
+        # Predicted data has no fetch time, so a failure after a prediction predicts the current slot again.
+        fetched_at = self.last_fetched
+        if fetched_at is None or dt_util.now() - fetched_at > STALE_DATA_MAX_AGE:
+            return None
+        return replace(self.data, stale=True)
 
-            return {"current": current_data, "future": future_data}
-        except Exception as err:
-            _LOGGER.error(f"Error updating data for route {self.route[CONF_ROUTE_NAME]}: {str(err)}")
-            return {}
+    def _predicted_data(self) -> Optional[KakaoNaviRouteData]:
+        """Fill the gap from the slot statistics of the route's history."""
+        now = dt_util.now()
+        duration = self.typical_eta(now)
+        if duration is None:
+            return None
+        distance = self.history.last_distance or 0
+        previous = self.data.current if self.data is not None else None
+        current = RouteSummary(
+            duration=duration,
+            distance=distance,
+            taxi_fare=previous.taxi_fare if previous else 0,
+            toll_fare=previous.toll_fare if previous else 0,
+            fetched_at=now,
+        )
+        forecasts = {}
+        for horizon in self.forecast_horizons:
+            departure = now + timedelta(minutes=horizon)
+            forecast = self.typical_eta(departure)
+            if forecast is not None:
+                forecasts[horizon] = replace(current, duration=forecast, departure_time=departure)
+        return KakaoNaviRouteData(
+            current=current,
+            future=forecasts.get(self._primary_horizon),
+            forecasts=forecasts,
+            stale=True,
+            predicted=True,
+        )
 
-    async def _get_current_data(self) -> Dict[str, Any]:
+    async def _async_fetch_route(self) -> KakaoNaviRouteData:
         try:
-            return await self.hass.async_add_executor_job(
-                self.client.direction,
-                self.route[CONF_START],
-                self.route[CONF_END],
-                self.route.get(CONF_WAYPOINT),
+            quota = self.client.quota
+            if quota is not None and quota.remaining <= 0:
+                raise UpdateFailed(f"Daily API call limit ({quota.daily_limit}) reached for route: {self.route[CONF_ROUTE_NAME]}")
+
+            # Geocode once and share the coordinates between both endpoints.
+            started = monotonic()
+            params = await self.client.resolve_route(
+                self.resolve_location(self.route[CONF_START]),
+                self.resolve_location(self.route[CONF_END]),
+                self.resolve_location(self.route.get(CONF_WAYPOINT)),
                 self.route.get(CONF_PRIORITY)
             )
+            self.metrics.geocode.record(monotonic() - started)
+            current_data, forecasts = await asyncio.gather(
+                self._get_current_data(params),
+                self._get_forecasts(params)
+            )
+
+            # Forecasts alone carry over from earlier refreshes, so without the current route it failed.
+            if current_data is None:
+                raise UpdateFailed(f"Failed to fetch data from Kakao Navi API for route: {self.route[CONF_ROUTE_NAME]}")
+
+            self._record_eta(current_data)
+            self._record_history(current_data)
+
+            return KakaoNaviRouteData(
+                current=current_data,
+                future=forecasts.get(self._primary_horizon),
+                forecasts=forecasts,
+                raw=dict(self._raw) if self.keep_raw_response else None,
+            )
+        except UpdateFailed:
+            raise
+        except Exception as err:
+            raise UpdateFailed(f"Error updating data for route {self.route[CONF_ROUTE_NAME]}: {str(err)}") from err
+
+    def _record_history(self, current: Optional[RouteSummary]) -> None:
+        if self.history is None or current is None:
+            return
+        self.history.add(current.fetched_at, current.duration, current.distance)
+        if self.history_store is not None:
+            self.history_store.async_schedule_save()
+
+    def _keep_raw(self, kind: str, response: Dict[str, Any]) -> None:
+        if self.keep_raw_response:
+            self._raw[kind] = response
+
+    async def _get_current_data(self, params: Dict[str, str]) -> Optional[RouteSummary]:
+        started = monotonic()
+        try:
+            response = await self.client.direction_from_params(params)
         except Exception as err:
             _LOGGER.error(f"Error getting current data: {str(err)}")
-            return {}
+            return None
+        finally:
+            self.metrics.directions.record(monotonic() - started)
+        self._keep_raw("current", response)
+        return RouteSummary.from_response(response, dt_util.now())
+
+    def _forecast_interval(self, horizon: int) -> timedelta:
+        """Far horizons change less between polls, so refresh them less often."""
+        return self._future_update_interval * max(1.0, horizon / DEFAULT_FORECAST_HORIZON)
 
-    async def _get_future_data(self) -> Dict[str, Any]:
+    async def _get_forecasts(self, params: Dict[str, str]) -> Dict[int, RouteSummary]:
         now = dt_util.now()
-        if self.last_future_update is None or (now - self.last_future_update) >= self._future_update_interval:
+        # Predicted forecasts are no API answer to carry forward.
+        previous = self.data.forecasts if self.data and not self.data.predicted else {}
+        due = [
+            horizon for horizon in self.forecast_horizons
+            if horizon not in self._last_forecast_update
+            or now - self._last_forecast_update[horizon] >= self._forecast_interval(horizon)
+        ]
+        fetched = await asyncio.gather(*(self._get_forecast(params, now, horizon) for horizon in due))
+
+        forecasts = {horizon: previous[horizon] for horizon in self.forecast_horizons if horizon in previous}
+        for horizon, forecast in zip(due, fetched):
+            # A failed horizon keeps its previous forecast and never discards the others.
+            if forecast is not None:
+                forecasts[horizon] = forecast
+        return forecasts
+
+    async def _get_forecast(self, params: Dict[str, str], now: datetime, horizon: int) -> Optional[RouteSummary]:
+        departure = now + timedelta(minutes=horizon)
+        started = monotonic()
+        try:
+            response = await self.client.future_direction_from_params(params, departure.strftime("%Y%m%d%H%M"))
+        except Exception as err:
+            _LOGGER.error(f"Error getting future data (+{horizon} min): {str(err)}")
+            return None
+        finally:
+            self.metrics.future_directions.record(monotonic() - started)
+        self._keep_raw(f"future_{horizon}", response)
+        summary = RouteSummary.from_response(response, now, departure)
+        # A response without a usable route is retried on the next refresh, not after the forecast interval.
+        if summary is not None:
+            self._last_forecast_update[horizon] = now
+        return summary
+
+class KakaoNaviMatrixCoordinator(KakaoNaviDataUpdateCoordinator):
+    """One origin to many destinations, or many origins to one destination.
+
+    Every target is answered by a single multi-route request per refresh
+    instead of one directions call per pair. Those endpoints have no
+    departure time, so matrix routes carry no forecasts or ETA history.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: KakaoNaviApiClient,
+        route: Dict[str, Any],
+        options: Optional[Mapping[str, Any]] = None,
+        data_store: Optional[KakaoNaviRouteDataStore] = None
+    ) -> None:
+        super().__init__(hass, client, route, options, data_store)
+
+    def apply_options(self, options: Mapping[str, Any]) -> None:
+        super().apply_options(options)
+        self.forecast_horizons = []
+
+    @property
+    def target_names(self) -> List[str]:
+        return [target[CONF_TARGET_NAME] for target in self.route[CONF_TARGETS]]
+
+    def typical_eta(self, when: datetime) -> Optional[int]:
+        return None
+
+    async def _async_fetch_route(self) -> KakaoNaviRouteData:
+        try:
+            quota = self.client.quota
+            if quota is not None and quota.remaining <= 0:
+                raise UpdateFailed(f"Daily API call limit ({quota.daily_limit}) reached for route: {self.route[CONF_ROUTE_NAME]}")
+
+            # Resolve entities first: an unknown location fails before any request is created.
+            location_address = {CONF_LOCATION: self.resolve_location(self.route[CONF_LOCATION])}
+            target_addresses = {
+                target[CONF_TARGET_NAME]: self.resolve_location(target[CONF_TARGET_ADDRESS])
+                for target in self.route[CONF_TARGETS]
+            }
+            started = monotonic()
+            location, targets = await asyncio.gather(
+                self.client.resolve_points(location_address),
+                self.client.resolve_points(target_addresses),
+            )
+            self.metrics.geocode.record(monotonic() - started)
+
+            radius = self.route.get(CONF_RADIUS, DEFAULT_MATRIX_RADIUS)
+            priority = self.route.get(CONF_PRIORITY) or PRIORITY_TIME
+            started = monotonic()
             try:
-                future_time = now + timedelta(minutes=30)
-                future_data = await self.hass.async_add_executor_job(
-                    self.client.future_direction,
-                    self.route[CONF_START],
-                    self.route[CONF_END],
-                    self.route.get(CONF_WAYPOINT),
-                    future_time.strftime("%Y%m%d%H%M"),
-                    self.route.get(CONF_PRIORITY)
-                )
-                self.last_future_update = now
-                return future_data
-            except Exception as err:
-                _LOGGER.error(f"Error getting future data: {str(err)}")
-                return {}
-        else:
-            return self.data.get("future", {}) if self.data else {}
\ No newline at end of file
+                if self.route.get(CONF_MATRIX_DIRECTION) == MATRIX_MANY_TO_ONE:
+                    response = await self.client.origins_directions(targets, location[CONF_LOCATION], radius, priority)
+                else:
+                    response = await self.client.destinations_directions(location[CONF_LOCATION], targets, radius, priority)
+            finally:
+                self.metrics.directions.record(monotonic() - started)
+            self._keep_raw("matrix", response)
+
+            summaries = RouteSummary.from_matrix_response(response, dt_util.now())
+            if not summaries:
+                raise UpdateFailed(f"No target of matrix route {self.route[CONF_ROUTE_NAME]} could be routed")
+            missing = [name for name in self.target_names if name not in summaries]
+            if missing:
+                _LOGGER.warning(f"Matrix route {self.route[CONF_ROUTE_NAME]} found no route for: {', '.join(missing)}")
+
+            # A target that failed this time keeps its previous summary.
+            previous = self.data.targets if self.data else {}
+            return KakaoNaviRouteData(
+                targets={
+                    name: summaries.get(name, previous.get(name))
+                    for name in self.target_names
+                    if name in summaries or name in previous
+                },
+                raw=dict(self._raw) if self.keep_raw_response else None,
+            )
+        except UpdateFailed:
+            raise
+        except Exception as err:
+            raise UpdateFailed(f"Error updating data for route {self.route[CONF_ROUTE_NAME]}: {str(err)}") from err
+
+
+def create_route_coordinator(
+    hass: HomeAssistant,
+    client: KakaoNaviApiClient,
+    route: Dict[str, Any],
+    options: Optional[Mapping[str, Any]] = None,
+    data_store: Optional[KakaoNaviRouteDataStore] = None,
+    history_store: Optional[KakaoNaviHistoryStore] = None
+) -> KakaoNaviDataUpdateCoordinator:
+    """Build the coordinator matching the route's type."""
+    if route.get(CONF_ROUTE_TYPE, ROUTE_TYPE_SINGLE) == ROUTE_TYPE_MATRIX:
+        return KakaoNaviMatrixCoordinator(hass, client, route, options, data_store)
+    return KakaoNaviDataUpdateCoordinator(hass, client, route, options, data_store, history_store)
+
+
+def _parse_time(value: Optional[str]) -> Optional[time]:
+    return dt_util.parse_time(value) if value else None
+
+
+def parse_forecast_horizons(value: Any) -> List[int]:
+    """Parse "15, 30, 60" (or a list) into sorted, unique horizons in minutes.
+
+    Raises ValueError for anything that is not 1 to MAX_FORECAST_HORIZONS
+    whole minutes between 1 and MAX_FORECAST_HORIZON.
+    """
+    parts = value if isinstance(value, (list, tuple)) else str(value).replace(" ", "").split(",")
+    horizons = sorted({int(part) for part in parts if str(part)})
+    if not horizons or len(horizons) > MAX_FORECAST_HORIZONS:
+        raise ValueError(f"Expected 1 to {MAX_FORECAST_HORIZONS} forecast horizons")
+    if horizons[0] < 1 or horizons[-1] > MAX_FORECAST_HORIZON:
+        raise ValueError(f"Forecast horizons must be between 1 and {MAX_FORECAST_HORIZON} minutes")
+    return horizons
@@ -0,0 +1,90 @@
+from typing import Callable, List, Optional
+from datetime import datetime, timedelta
+from homeassistant.const import ATTR_LATITUDE, ATTR_LONGITUDE, STATE_HOME, STATE_ON
+from homeassistant.core import Event, HomeAssistant, callback, split_entity_id
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.util import dt as dt_util
+from .const import DEFAULT_ACTIVATION_ZONE, DEFAULT_CALENDAR_LEAD, LOCATION_ENTITY_DOMAINS, LOCATION_GRID
+
+
+class RouteDemand:
+    """Whether anything linked to a route says someone may leave soon.
+
+    A route is active while any of its entities is: a person or device
+    tracker in the activation zone, a calendar with an event running or
+    starting within the lead time, or anything else that is on.
+    """
+
+    def __init__(self, hass: HomeAssistant, entity_ids: List[str],
+                 zone_entity_id: str = DEFAULT_ACTIVATION_ZONE,
+                 calendar_lead: timedelta = timedelta(minutes=DEFAULT_CALENDAR_LEAD)) -> None:
+        self.hass = hass
+        self.entity_ids = entity_ids
+        self.zone_entity_id = zone_entity_id
+        self.calendar_lead = calendar_lead
+
+    @property
+    def is_active(self) -> bool:
+        now = dt_util.now()
+        return any(self._entity_active(entity_id, now) for entity_id in self.entity_ids)
+
+    def _entity_active(self, entity_id: str, now: datetime) -> bool:
+        state = self.hass.states.get(entity_id)
+        if state is None:
+            return False
+        domain = split_entity_id(entity_id)[0]
+        if domain in ("person", "device_tracker"):
+            return state.state == self._zone_state()
+        if domain == "calendar":
+            if state.state == STATE_ON:
+                return True
+            start = dt_util.parse_datetime(state.attributes.get("start_time") or "")
+            if start is None:
+                return False
+            # Calendar entities report the next event's start in local time without an offset.
+            if start.tzinfo is None:
+                start = start.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+            return now <= start <= now + self.calendar_lead
+        return state.state == STATE_ON
+
+    def _zone_state(self) -> Optional[str]:
+        """The state a person or device tracker has while inside the activation zone."""
+        if self.zone_entity_id == DEFAULT_ACTIVATION_ZONE:
+            return STATE_HOME
+        zone = self.hass.states.get(self.zone_entity_id)
+        return zone.name if zone is not None else None
+
+    @callback
+    def async_track(self, action: Callable[[], None]) -> Callable[[], None]:
+        """Call action whenever one of the linked entities changes state."""
+        @callback
+        def _async_state_changed(event: Event) -> None:
+            action()
+
+        return async_track_state_change_event(self.hass, self.entity_ids, _async_state_changed)
+
+
+def is_location_entity(value: Optional[str]) -> bool:
+    if not value or "." not in value or " " in value:
+        return False
+    return split_entity_id(value)[0] in LOCATION_ENTITY_DOMAINS
+
+
+def entity_location(hass: HomeAssistant, entity_id: str) -> Optional[str]:
+    """The "x,y" coordinates of a person, device tracker or zone, snapped to LOCATION_GRID.
+
+    Snapping keeps small GPS jitter from changing the request parameters, so
+    consecutive refreshes and routes sharing an origin still hit the caches.
+    """
+    state = hass.states.get(entity_id)
+    if state is None:
+        return None
+    latitude = state.attributes.get(ATTR_LATITUDE)
+    longitude = state.attributes.get(ATTR_LONGITUDE)
+    if latitude is None or longitude is None:
+        return None
+    return f"{_snap(float(longitude)):.6f},{_snap(float(latitude)):.6f}"
+
+
+def _snap(value: float) -> float:
+    return round(value / LOCATION_GRID) * LOCATION_GRID
@@ -0,0 +1,62 @@
+from typing import Any, Dict
+from dataclasses import asdict
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN, CONF_APIKEY, CONF_START, CONF_END, CONF_WAYPOINT, CONF_LOCATION, CONF_TARGETS,
+    CONF_ACTIVATION_ENTITIES, CONF_ACTIVATION_ZONE
+)
+
+TO_REDACT = {
+    CONF_APIKEY, CONF_START, CONF_END, CONF_WAYPOINT, CONF_LOCATION, CONF_TARGETS,
+    CONF_ACTIVATION_ENTITIES, CONF_ACTIVATION_ZONE,
+}
+
+# Where the raw API responses give away the locations of a route.
+RAW_TO_REDACT = {"origin", "destination", "waypoints", "bound", "vertexes", "guides", "x", "y"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> Dict[str, Any]:
+    scheduler = hass.data[DOMAIN][entry.entry_id]
+    client = scheduler.client
+    quota = client.quota
+
+    now = dt_util.now()
+    routes = {}
+    for route_name, coordinator in scheduler.coordinators.items():
+        data = coordinator.data
+        history = coordinator.history
+        slot = history.stats(now) if history is not None else None
+        routes[route_name] = {
+            "last_update_success": coordinator.last_update_success,
+            "refresh_interval_s": coordinator.refresh_interval.total_seconds(),
+            "metrics": coordinator.metrics.as_dict(),
+            "current": asdict(data.current) if data and data.current else None,
+            "future": asdict(data.future) if data and data.future else None,
+            "targets": {name: asdict(target) for name, target in data.targets.items()} if data else None,
+            "raw": async_redact_data(data.raw, RAW_TO_REDACT) if data else None,
+            "history": {
+                "samples": len(history),
+                "current_slot": slot._asdict() if slot is not None else None,
+            } if history is not None else None,
+        }
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "quota": {
+            "remaining": quota.remaining,
+            "used_today": quota.used_today,
+            "daily_limit": quota.daily_limit,
+            "interval_multiplier": quota.interval_multiplier,
+        } if quota is not None else None,
+        "caches": {
+            "geocode_entries": len(client.geocode_cache) if client.geocode_cache is not None else None,
+            "response_entries": len(client.response_cache),
+        },
+        "routes": routes,
+    }
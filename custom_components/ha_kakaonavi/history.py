@@ -0,0 +1,165 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from array import array
+from bisect import bisect_left, insort
+from datetime import datetime
+import base64
+import logging
+import sys
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    HISTORY_CAPACITY,
+    HISTORY_SLOT_MINUTES,
+    HISTORY_STORAGE_VERSION,
+    HISTORY_SAVE_DELAY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SLOTS_PER_DAY = 24 * 60 // HISTORY_SLOT_MINUTES
+
+
+class SlotStats(NamedTuple):
+    count: int
+    median: int
+    p10: int
+    p90: int
+
+
+class EtaHistory:
+    """Ring buffer of (timestamp, duration, distance) samples for one route.
+
+    Samples live in three parallel typed arrays. Alongside, every weekday and
+    time-of-day slot keeps its durations sorted, updated as samples are added
+    and evicted, so slot medians and percentiles are a lookup rather than a
+    scan of the whole buffer.
+    """
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY) -> None:
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._durations = array("I", bytes(4 * capacity))
+        self._distances = array("I", bytes(4 * capacity))
+        self._start = 0
+        self._size = 0
+        self._slots: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def slot_of(when: datetime) -> int:
+        local = dt_util.as_local(when)
+        return local.weekday() * SLOTS_PER_DAY + (local.hour * 60 + local.minute) // HISTORY_SLOT_MINUTES
+
+    def add(self, when: datetime, duration: int, distance: int) -> None:
+        if self._size == self.capacity:
+            self._evict_oldest()
+        index = (self._start + self._size) % self.capacity
+        self._timestamps[index] = when.timestamp()
+        self._durations[index] = duration
+        self._distances[index] = distance
+        self._size += 1
+        insort(self._slots.setdefault(self.slot_of(when), []), duration)
+
+    def _evict_oldest(self) -> None:
+        when = dt_util.utc_from_timestamp(self._timestamps[self._start])
+        durations = self._slots.get(self.slot_of(when))
+        if durations:
+            position = bisect_left(durations, self._durations[self._start])
+            if position < len(durations) and durations[position] == self._durations[self._start]:
+                del durations[position]
+        self._start = (self._start + 1) % self.capacity
+        self._size -= 1
+
+    @property
+    def last_distance(self) -> Optional[int]:
+        if not self._size:
+            return None
+        return self._distances[(self._start + self._size - 1) % self.capacity]
+
+    def stats(self, when: datetime) -> Optional[SlotStats]:
+        durations = self._slots.get(self.slot_of(when))
+        if not durations:
+            return None
+        count = len(durations)
+        return SlotStats(
+            count=count,
+            median=durations[count // 2],
+            p10=durations[int(count * 0.1)],
+            p90=durations[min(int(count * 0.9), count - 1)],
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Pack the samples oldest first as base64 little-endian arrays."""
+        order = [(self._start + offset) % self.capacity for offset in range(self._size)]
+        return {
+            "timestamps": _pack(array("d", (self._timestamps[i] for i in order))),
+            "durations": _pack(array("I", (self._durations[i] for i in order))),
+            "distances": _pack(array("I", (self._distances[i] for i in order))),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], capacity: int = HISTORY_CAPACITY) -> "EtaHistory":
+        history = cls(capacity)
+        try:
+            timestamps = _unpack("d", data["timestamps"])
+            durations = _unpack("I", data["durations"])
+            distances = _unpack("I", data["distances"])
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning(f"Discarding unreadable ETA history: {str(err)}")
+            return history
+        for timestamp, duration, distance in zip(timestamps, durations, distances):
+            history.add(dt_util.utc_from_timestamp(timestamp), duration, distance)
+        return history
+
+
+def _pack(values: array) -> str:
+    if sys.byteorder == "big":
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _unpack(typecode: str, packed: str) -> array:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(packed))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class KakaoNaviHistoryStore:
+    """ETA histories of every route of a config entry, persisted through Store."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store = Store(hass, HISTORY_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.history")
+        self._histories: Dict[str, EtaHistory] = {}
+
+    async def async_load(self, route_names: Iterable[str]) -> None:
+        stored = await self._store.async_load() or {}
+        for route_name in route_names:
+            saved = stored.get("routes", {}).get(route_name)
+            self._histories[route_name] = EtaHistory.from_dict(saved) if saved else EtaHistory()
+
+    def get(self, route_name: str) -> EtaHistory:
+        return self._histories.setdefault(route_name, EtaHistory())
+
+    def async_remove_route(self, route_name: str) -> None:
+        if self._histories.pop(route_name, None) is not None:
+            self.async_schedule_save()
+
+    def async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+    def _data_to_save(self) -> Dict[str, Any]:
+        return {"routes": {name: history.as_dict() for name, history in self._histories.items() if len(history)}}
+
+
+async def async_remove_history(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the ETA history of a config entry that is being removed."""
+    await KakaoNaviHistoryStore(hass, entry_id).async_remove()
@@ -0,0 +1,93 @@
+from typing import Any, Deque, Dict, Optional
+from collections import deque
+from contextvars import ContextVar
+from .const import METRICS_WINDOW, METRICS_BUCKETS_MS
+
+# The route whose refresh is running in the current task. The API client is
+# shared by every route of an entry, so it reports cache and retry events here.
+CURRENT_ROUTE_METRICS: ContextVar[Optional["RouteMetrics"]] = ContextVar(
+    "kakaonavi_route_metrics", default=None
+)
+
+
+class RollingHistogram:
+    """Durations of the last METRICS_WINDOW samples, summarised on demand."""
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds * 1000)
+        self.count += 1
+
+    @property
+    def last(self) -> Optional[float]:
+        return self._samples[-1] if self._samples else None
+
+    def percentile(self, share: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(share * len(ordered)), len(ordered) - 1)]
+
+    def as_dict(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}": 0 for bound in METRICS_BUCKETS_MS}
+        buckets["inf"] = 0
+        for sample in self._samples:
+            bound = next((bound for bound in METRICS_BUCKETS_MS if sample <= bound), None)
+            buckets[f"le_{bound}" if bound is not None else "inf"] += 1
+        return {
+            "count": self.count,
+            "last_ms": _round(self.last),
+            "p50_ms": _round(self.percentile(0.5)),
+            "p95_ms": _round(self.percentile(0.95)),
+            "max_ms": _round(max(self._samples) if self._samples else None),
+            "buckets": buckets,
+        }
+
+
+class RouteMetrics:
+    """Timings and counters for one route, kept in memory only."""
+
+    def __init__(self) -> None:
+        self.refresh = RollingHistogram()
+        self.geocode = RollingHistogram()
+        self.directions = RollingHistogram()
+        self.future_directions = RollingHistogram()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.retries = 0
+        self.errors = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "refresh": self.refresh.as_dict(),
+            "geocode": self.geocode.as_dict(),
+            "directions": self.directions.as_dict(),
+            "future_directions": self.future_directions.as_dict(),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "retries": self.retries,
+            "errors": self.errors,
+        }
+
+
+def record_cache_lookup(hit: bool) -> None:
+    metrics = CURRENT_ROUTE_METRICS.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def record_retry() -> None:
+    metrics = CURRENT_ROUTE_METRICS.get()
+    if metrics is not None:
+        metrics.retries += 1
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
@@ -0,0 +1,123 @@
+from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from homeassistant.util import dt as dt_util
+
+
+@dataclass(frozen=True, slots=True)
+class RouteSummary:
+    """The summary fields of one Kakao directions response.
+
+    Durations are in seconds, distances in meters and fares in KRW.
+    """
+
+    duration: int
+    distance: int
+    taxi_fare: int
+    toll_fare: int
+    fetched_at: datetime
+    departure_time: Optional[datetime] = None
+
+    @classmethod
+    def from_response(cls, data: Dict[str, Any], fetched_at: datetime,
+                      departure_time: Optional[datetime] = None) -> Optional["RouteSummary"]:
+        """Parse a directions response, or return None when it holds no usable route."""
+        try:
+            route = data["routes"][0]
+            if route.get("result_code", 0) != 0:
+                return None
+            summary = route["summary"]
+            fare = summary.get("fare", {})
+            return cls(
+                duration=int(summary["duration"]),
+                distance=int(summary["distance"]),
+                taxi_fare=int(fare.get("taxi", 0)),
+                toll_fare=int(fare.get("toll", 0)),
+                fetched_at=fetched_at,
+                departure_time=departure_time,
+            )
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+    @classmethod
+    def from_matrix_response(cls, data: Dict[str, Any], fetched_at: datetime) -> Dict[str, "RouteSummary"]:
+        """Parse a multi-origin or multi-destination response into summaries by key.
+
+        Entries that found no route (e.g. outside the search radius) are left out.
+        These endpoints report no fares.
+        """
+        summaries = {}
+        for route in data.get("routes") or []:
+            try:
+                if route.get("result_code", 0) != 0:
+                    continue
+                summaries[str(route["key"])] = cls(
+                    duration=int(route["summary"]["duration"]),
+                    distance=int(route["summary"]["distance"]),
+                    taxi_fare=0,
+                    toll_fare=0,
+                    fetched_at=fetched_at,
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        return summaries
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "duration": self.duration,
+            "distance": self.distance,
+            "taxi_fare": self.taxi_fare,
+            "toll_fare": self.toll_fare,
+            "fetched_at": self.fetched_at.isoformat(),
+            "departure_time": self.departure_time.isoformat() if self.departure_time else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["RouteSummary"]:
+        """Rebuild a summary saved with as_dict, or return None if it cannot be read."""
+        if not data:
+            return None
+        try:
+            fetched_at = dt_util.parse_datetime(data["fetched_at"])
+            if fetched_at is None:
+                return None
+            departure_time = dt_util.parse_datetime(data["departure_time"]) if data.get("departure_time") else None
+            return cls(
+                duration=int(data["duration"]),
+                distance=int(data["distance"]),
+                taxi_fare=int(data["taxi_fare"]),
+                toll_fare=int(data["toll_fare"]),
+                fetched_at=fetched_at,
+                departure_time=departure_time,
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+@dataclass(slots=True)
+class KakaoNaviRouteData:
+    """What a route coordinator keeps between refreshes."""
+
+    current: Optional[RouteSummary] = None
+    # The forecast for the primary horizon, shown as future_eta.
+    future: Optional[RouteSummary] = None
+    # Every configured forecast horizon, in minutes from the time of the query.
+    forecasts: Dict[int, RouteSummary] = field(default_factory=dict)
+    # Matrix routes only: one summary per destination (or origin), by name.
+    targets: Dict[str, RouteSummary] = field(default_factory=dict)
+    # Full API responses, only kept when the debug option is enabled.
+    raw: Optional[Dict[str, Any]] = None
+    # Set when a refresh failed and this is the last good data being served again.
+    stale: bool = False
+    # Set when no live or recent data was available and the values are the
+    # typical ETA for this time slot from the route's history.
+    predicted: bool = False
+
+    @property
+    def fetched_at(self) -> Optional[datetime]:
+        """When the newest live value in this data was fetched; None for values predicted from history."""
+        if self.predicted:
+            return None
+        if self.current is not None:
+            return self.current.fetched_at
+        return max((target.fetched_at for target in self.targets.values()), default=None)
@@ -0,0 +1,123 @@
+from typing import Any, Dict
+from datetime import date
+import asyncio
+import hashlib
+import time
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    DATA_QUOTA_MANAGERS,
+    MAX_DAILY_CALLS,
+    DEFAULT_REQUESTS_PER_SECOND,
+    MAX_INTERVAL_STRETCH,
+    QUOTA_STORAGE_VERSION,
+    QUOTA_SAVE_DELAY,
+)
+
+
+class QuotaExceededError(HomeAssistantError):
+    """Raised when the daily budget of an API key is used up."""
+
+
+class TokenBucket:
+    """Async token bucket that spaces out requests to a steady rate."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def async_acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class KakaoNaviQuotaManager:
+    """Daily budget and request rate shared by everything using one API key.
+
+    Kakao counts calls per key, not per route, so every client built for the
+    same key gets the same manager. The day's usage is persisted through
+    Store and survives restarts.
+    """
+
+    def __init__(self, hass: HomeAssistant, api_key: str, daily_limit: int = MAX_DAILY_CALLS,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND) -> None:
+        self.hass = hass
+        self.daily_limit = daily_limit
+        self._bucket = TokenBucket(requests_per_second, requests_per_second)
+        self._store: Store = Store(hass, QUOTA_STORAGE_VERSION, f"{DOMAIN}.quota.{api_key_id(api_key)}")
+        self._day: date = dt_util.now().date()
+        self.used_today = 0
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if stored and stored.get("date") == self._day.isoformat():
+            self.used_today = stored.get("used", 0)
+
+    def _roll_over(self) -> None:
+        today = dt_util.now().date()
+        if today != self._day:
+            self._day = today
+            self.used_today = 0
+
+    @property
+    def remaining(self) -> int:
+        self._roll_over()
+        return max(self.daily_limit - self.used_today, 0)
+
+    @property
+    def interval_multiplier(self) -> float:
+        """Factor to stretch polling intervals by so the budget lasts until midnight.
+
+        Returns 1.0 while the share of budget left is at least the share of the
+        day left, and grows (up to MAX_INTERVAL_STRETCH) as usage runs ahead.
+        """
+        now = dt_util.now()
+        midnight = dt_util.start_of_local_day(now)
+        day_left = 1 - (now - midnight).total_seconds() / 86400
+        budget_left = self.remaining / self.daily_limit
+        if budget_left >= day_left:
+            return 1.0
+        if budget_left <= 0:
+            return MAX_INTERVAL_STRETCH
+        return min(day_left / budget_left, MAX_INTERVAL_STRETCH)
+
+    async def async_acquire(self) -> None:
+        """Reserve one call, waiting for the rate limiter if needed."""
+        if self.remaining <= 0:
+            raise QuotaExceededError(f"Daily API call limit ({self.daily_limit}) reached")
+        await self._bucket.async_acquire()
+        self.used_today += 1
+        self._store.async_delay_save(self._data_to_save, QUOTA_SAVE_DELAY)
+
+    def _data_to_save(self) -> Dict[str, Any]:
+        return {"date": self._day.isoformat(), "used": self.used_today}
+
+
+def api_key_id(api_key: str) -> str:
+    """Short, stable identifier for an API key that is safe to use in file names."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+async def async_get_quota_manager(hass: HomeAssistant, api_key: str) -> KakaoNaviQuotaManager:
+    """Return the quota manager shared by every config entry using this API key."""
+    managers = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_QUOTA_MANAGERS, {})
+    key_id = api_key_id(api_key)
+    manager = managers.get(key_id)
+    if manager is None:
+        manager = KakaoNaviQuotaManager(hass, api_key)
+        await manager.async_load()
+        manager = managers.setdefault(key_id, manager)
+    return manager
@@ -0,0 +1,88 @@
+from typing import Optional
+import logging
+import random
+import time
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from .const import (
+    DOMAIN,
+    DATA_CIRCUIT_BREAKERS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+from .quota import api_key_id
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitOpenError(HomeAssistantError):
+    """Raised instead of calling an upstream that keeps failing."""
+
+
+class CircuitBreaker:
+    """Stop calling the API after repeated transient failures.
+
+    After CIRCUIT_FAILURE_THRESHOLD consecutive failures the circuit opens and
+    requests fail fast for CIRCUIT_RESET_TIMEOUT seconds. After that a single
+    probe request is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow_request(self) -> bool:
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at < self.reset_timeout:
+            return False
+        # Let one probe through and hold everything else back for another
+        # timeout, which also covers a probe that never reports back.
+        self._opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            _LOGGER.info("Kakao API is responding again, closing the circuit")
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._opened_at is None and self.failures >= self.failure_threshold:
+            _LOGGER.warning(f"Kakao API failed {self.failures} times in a row, pausing requests "
+                            f"for {self.reset_timeout} seconds")
+        if self._opened_at is not None or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Capped exponential backoff with full jitter."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Read a Retry-After header given in seconds; HTTP dates are ignored."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+@callback
+def async_get_circuit_breaker(hass: HomeAssistant, api_key: str) -> CircuitBreaker:
+    """Return the circuit breaker shared by every config entry using this API key."""
+    breakers = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_CIRCUIT_BREAKERS, {})
+    return breakers.setdefault(api_key_id(api_key), CircuitBreaker())
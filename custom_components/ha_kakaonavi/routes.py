@@ -0,0 +1,131 @@
+from typing import Any, Dict, Iterable, List, Optional
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from .api import KakaoNaviApiClient
+from .cache import is_coordinates
+from .coordinator import parse_forecast_horizons
+from .demand import is_location_entity
+from .const import (
+    DOMAIN, CONF_ROUTES, CONF_ROUTE_NAME, CONF_START, CONF_END, CONF_WAYPOINT, CONF_PRIORITY,
+    PRIORITY_OPTIONS, PRIORITY_RECOMMEND, PRIORITY_TIME, MATRIX_PRIORITY_OPTIONS,
+    CONF_ROUTE_TYPE, ROUTE_TYPE_SINGLE, ROUTE_TYPE_MATRIX, CONF_MATRIX_DIRECTION, MATRIX_DIRECTIONS,
+    MATRIX_ONE_TO_MANY, CONF_LOCATION, CONF_TARGETS, CONF_TARGET_NAME, CONF_TARGET_ADDRESS,
+    CONF_RADIUS, DEFAULT_MATRIX_RADIUS, MAX_MATRIX_RADIUS, MAX_MATRIX_TARGETS,
+    CONF_UPDATE_INTERVAL, CONF_FUTURE_UPDATE_INTERVAL, CONF_FORECAST_HORIZONS,
+    CONF_ACTIVATION_ENTITIES, CONF_ACTIVATION_ZONE, CONF_INACTIVE_INTERVAL, CONF_CALENDAR_LEAD
+)
+
+
+def _forecast_horizons(value: Any) -> str:
+    try:
+        return ", ".join(str(horizon) for horizon in parse_forecast_horizons(value))
+    except ValueError as err:
+        raise vol.Invalid(str(err)) from err
+
+
+def _unique_target_names(targets: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    names = [target[CONF_TARGET_NAME] for target in targets]
+    if len(set(names)) != len(names):
+        raise vol.Invalid("Target names must be unique within a matrix route")
+    return targets
+
+
+# Per-route overrides of the entry-wide options.
+ROUTE_SETTINGS = {
+    vol.Optional(CONF_UPDATE_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional(CONF_FUTURE_UPDATE_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional(CONF_FORECAST_HORIZONS): _forecast_horizons,
+    vol.Optional(CONF_ACTIVATION_ENTITIES): cv.entity_ids,
+    vol.Optional(CONF_ACTIVATION_ZONE): cv.entity_id,
+    vol.Optional(CONF_INACTIVE_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    vol.Optional(CONF_CALENDAR_LEAD): vol.All(vol.Coerce(int), vol.Range(min=0)),
+}
+
+SINGLE_ROUTE_SCHEMA = vol.Schema({
+    vol.Required(CONF_ROUTE_NAME): cv.string,
+    vol.Optional(CONF_ROUTE_TYPE, default=ROUTE_TYPE_SINGLE): ROUTE_TYPE_SINGLE,
+    vol.Required(CONF_START): cv.string,
+    vol.Required(CONF_END): cv.string,
+    vol.Optional(CONF_WAYPOINT): cv.string,
+    vol.Optional(CONF_PRIORITY, default=PRIORITY_RECOMMEND): vol.In(PRIORITY_OPTIONS),
+    **ROUTE_SETTINGS,
+})
+
+MATRIX_ROUTE_SCHEMA = vol.Schema({
+    vol.Required(CONF_ROUTE_NAME): cv.string,
+    vol.Required(CONF_ROUTE_TYPE): ROUTE_TYPE_MATRIX,
+    vol.Optional(CONF_MATRIX_DIRECTION, default=MATRIX_ONE_TO_MANY): vol.In(MATRIX_DIRECTIONS),
+    vol.Required(CONF_LOCATION): cv.string,
+    vol.Required(CONF_TARGETS): vol.All(
+        cv.ensure_list,
+        [vol.Schema({vol.Required(CONF_TARGET_NAME): cv.string, vol.Required(CONF_TARGET_ADDRESS): cv.string})],
+        vol.Length(min=1, max=MAX_MATRIX_TARGETS),
+        _unique_target_names,
+    ),
+    vol.Optional(CONF_PRIORITY, default=PRIORITY_TIME): vol.In(MATRIX_PRIORITY_OPTIONS),
+    vol.Optional(CONF_RADIUS, default=DEFAULT_MATRIX_RADIUS): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=MAX_MATRIX_RADIUS)),
+    **ROUTE_SETTINGS,
+})
+
+ROUTE_SCHEMA = vol.Any(MATRIX_ROUTE_SCHEMA, SINGLE_ROUTE_SCHEMA)
+
+
+def normalize_route(route: Dict[str, Any]) -> Dict[str, Any]:
+    """The form a route takes after ROUTE_SCHEMA, so routes saved by the forms compare
+    equal to the same route given to the service or in YAML."""
+    route = {key: value for key, value in route.items() if value is not None}
+    try:
+        return ROUTE_SCHEMA(route)
+    except vol.Invalid:
+        # Stored before validation existed; compare it as saved, with the default type.
+        return {CONF_ROUTE_TYPE: ROUTE_TYPE_SINGLE, **route}
+
+
+def route_addresses(route: Dict[str, Any]) -> List[str]:
+    """The addresses of a route that need geocoding, leaving out entities and coordinates."""
+    values = [route.get(CONF_START), route.get(CONF_END), route.get(CONF_WAYPOINT), route.get(CONF_LOCATION)]
+    values.extend(target[CONF_TARGET_ADDRESS] for target in route.get(CONF_TARGETS, []))
+    return [value for value in values if value and not is_location_entity(value) and not is_coordinates(value)]
+
+
+async def async_validate_routes(client: KakaoNaviApiClient, routes: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+    """Geocode every address of routes at once; return an error message per failing route."""
+    routes = list(routes)
+    failed = await client.validate_addresses(
+        address for route in routes for address in route_addresses(route))
+    errors = {}
+    for route in routes:
+        messages = [f"{address}: {failed[address]}" for address in route_addresses(route) if address in failed]
+        if messages:
+            errors[route[CONF_ROUTE_NAME]] = "; ".join(messages)
+    return errors
+
+
+def merge_routes(existing: Iterable[Dict[str, Any]], upserts: Iterable[Dict[str, Any]],
+                 remove: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """Replace routes by name, append new ones and drop the removed ones, keeping the order."""
+    merged = {route[CONF_ROUTE_NAME]: dict(route) for route in existing}
+    for route in upserts:
+        merged[route[CONF_ROUTE_NAME]] = dict(route)
+    for route_name in remove:
+        merged.pop(route_name, None)
+    return list(merged.values())
+
+
+async def async_update_entry_routes(hass: HomeAssistant, entry: ConfigEntry,
+                                    routes: List[Dict[str, Any]]) -> Optional[Dict[str, List[str]]]:
+    """Store a new route list on the entry, applying it in place when the entry is loaded.
+
+    Returns what changed when it was applied in place. Otherwise the routes
+    are only stored and take effect when the entry is set up.
+    """
+    scheduler = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    changes = None
+    if scheduler is not None:
+        changes = await scheduler.async_apply_routes(routes)
+    # The scheduler already runs these routes, so the update listener has nothing left to do.
+    hass.config_entries.async_update_entry(entry, options={**entry.options, CONF_ROUTES: routes})
+    return changes
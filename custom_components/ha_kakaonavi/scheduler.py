@@ -0,0 +1,272 @@
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+from .api import KakaoNaviApiClient
+from .coordinator import KakaoNaviDataUpdateCoordinator, create_route_coordinator
+from .history import KakaoNaviHistoryStore
+from .routes import normalize_route
+from .storage import KakaoNaviRouteDataStore
+from .const import (
+    SCHEDULER_TICK, FAILED_REFRESH_RETRY_DELAY,
+    CONF_ROUTE_NAME, CONF_START, CONF_END, CONF_WAYPOINT, CONF_LOCATION, CONF_TARGETS,
+    CONF_ROUTE_TYPE, CONF_MATRIX_DIRECTION, CONF_ROUTES
+)
+
+# Route settings that change where a route goes; its saved data and history no longer apply.
+PATH_KEYS = (CONF_ROUTE_TYPE, CONF_START, CONF_END, CONF_WAYPOINT, CONF_LOCATION, CONF_TARGETS, CONF_MATRIX_DIRECTION)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class KakaoNaviRouteScheduler:
+    """Drive the refreshes of every route of a config entry from a single timer.
+
+    The route coordinators are created without an update interval of their
+    own. The scheduler wakes up every SCHEDULER_TICK and refreshes the routes
+    that are due; the client caps how many requests reach the API at a time.
+    Start times are staggered across the interval so that routes sharing an
+    interval do not all fire at the same moment, and routes whose refresh
+    failed are retried with a growing delay instead of waiting a full interval.
+
+    Routes with activation entities are paused (or slowed down) while none of
+    them is active, and refreshed right away when one becomes active.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: KakaoNaviApiClient,
+        coordinators: Dict[str, KakaoNaviDataUpdateCoordinator],
+        options: Optional[Mapping[str, Any]] = None,
+        data_store: Optional[KakaoNaviRouteDataStore] = None,
+        history_store: Optional[KakaoNaviHistoryStore] = None,
+    ) -> None:
+        self.hass = hass
+        self.client = client
+        self.coordinators = coordinators
+        # The entry options the running routes were built from.
+        self.options: Dict[str, Any] = dict(options or {})
+        self.data_store = data_store
+        self.history_store = history_store
+        # Set by the sensor platform so that routes added later get their entities too.
+        self.async_add_route_entities: Optional[Callable[[str, KakaoNaviDataUpdateCoordinator], None]] = None
+        self.route_entities: Dict[str, List[Entity]] = {}
+        self._next_refresh: Dict[str, datetime] = {}
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._failures: Dict[str, int] = {}
+        self._active: Dict[str, bool] = {}
+        self._unsub_tick: Optional[Callable[[], None]] = None
+        self._unsub_demand: Dict[str, Callable[[], None]] = {}
+
+    async def async_first_refresh(self, route_names: Optional[Iterable[str]] = None) -> None:
+        """Refresh routes concurrently (all by default).
+
+        A failing route never fails the others: its entities start out
+        unavailable and the scheduler keeps retrying it in the background.
+        """
+        names = list(self.coordinators if route_names is None else route_names)
+        # Registered as in flight so the running scheduler does not refresh them a second time.
+        tasks = []
+        for route_name in names:
+            task = self.hass.async_create_task(self._async_refresh_route(route_name, self.coordinators[route_name]))
+            if not task.done():
+                self._in_flight[route_name] = task
+            tasks.append(task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._stagger(dt_util.utcnow(), names)
+
+    @callback
+    def async_start(self) -> None:
+        self._stagger(dt_util.utcnow())
+        self._unsub_tick = async_track_time_interval(self.hass, self._async_tick, SCHEDULER_TICK)
+        for route_name, coordinator in self.coordinators.items():
+            self._track_demand(route_name, coordinator)
+
+    @callback
+    def _track_demand(self, route_name: str, coordinator: KakaoNaviDataUpdateCoordinator) -> None:
+        self._active[route_name] = coordinator.is_active
+        if coordinator.demand is not None:
+            self._unsub_demand[route_name] = coordinator.demand.async_track(self._demand_listener(route_name))
+
+    def _demand_listener(self, route_name: str) -> Callable[[], None]:
+        @callback
+        def _async_demand_changed() -> None:
+            self._async_check_demand(route_name, dt_util.utcnow())
+
+        return _async_demand_changed
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub_tick is not None:
+            self._unsub_tick()
+            self._unsub_tick = None
+        for unsub in self._unsub_demand.values():
+            unsub()
+        self._unsub_demand.clear()
+        for task in self._in_flight.values():
+            task.cancel()
+        self._in_flight.clear()
+
+    async def async_apply_options(self, options: Mapping[str, Any]) -> Dict[str, List[str]]:
+        """Apply changed entry options to the running routes without reloading the entry.
+
+        Settings are applied to the existing coordinators in place, then only
+        the routes that were added, edited or removed are rebuilt. Routes whose
+        interval changed are rescheduled from their last refresh.
+        """
+        options = dict(options)
+        routes = [dict(route) for route in options.get(CONF_ROUTES, [])]
+        self.options = {**options, CONF_ROUTES: self.options.get(CONF_ROUTES, [])}
+        for coordinator in self.coordinators.values():
+            coordinator.apply_options(self.options)
+
+        changes = await self.async_apply_routes(routes)
+
+        now = dt_util.utcnow()
+        for route_name, coordinator in self.coordinators.items():
+            if route_name in self._in_flight or self._failures.get(route_name) or coordinator.last_fetched is None:
+                continue
+            self._next_refresh[route_name] = max(coordinator.last_fetched + coordinator.refresh_interval, now)
+        return changes
+
+    async def async_apply_routes(self, routes: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """Bring the running routes in line with routes, touching only what changed.
+
+        Unchanged routes keep their coordinator, data and schedule. Removed and
+        changed routes are torn down; changed and added ones get a new
+        coordinator, which is refreshed before its entities are added.
+        """
+        wanted = {route[CONF_ROUTE_NAME]: route for route in routes}
+        # Defaults and empty fields differ between the forms, the service and YAML.
+        running = {name: normalize_route(coordinator.route) for name, coordinator in self.coordinators.items()}
+        normalized = {name: normalize_route(route) for name, route in wanted.items()}
+        removed = [name for name in self.coordinators if name not in wanted]
+        updated = [name for name, route in normalized.items() if name in running and running[name] != route]
+        added = [name for name in wanted if name not in self.coordinators]
+
+        for route_name in removed + updated:
+            old_route = running[route_name]
+            new_route = normalized.get(route_name)
+            await self._async_remove_route(
+                route_name,
+                forget_entities=new_route is None,
+                forget_data=new_route is None or any(old_route.get(key) != new_route.get(key) for key in PATH_KEYS),
+            )
+
+        created = {route_name: self._create_coordinator(wanted[route_name]) for route_name in updated + added}
+        self.coordinators.update(created)
+        await self.async_first_refresh(created)
+        for route_name, coordinator in created.items():
+            if self._unsub_tick is not None:
+                self._track_demand(route_name, coordinator)
+            if self.async_add_route_entities is not None:
+                self.async_add_route_entities(route_name, coordinator)
+
+        self.options[CONF_ROUTES] = routes
+        return {"added": added, "updated": updated, "removed": removed}
+
+    def _create_coordinator(self, route: Dict[str, Any]) -> KakaoNaviDataUpdateCoordinator:
+        return create_route_coordinator(self.hass, self.client, route, self.options, self.data_store, self.history_store)
+
+    async def _async_remove_route(self, route_name: str, forget_entities: bool, forget_data: bool) -> None:
+        self.coordinators.pop(route_name)
+        task = self._in_flight.pop(route_name, None)
+        if task is not None:
+            task.cancel()
+        unsub = self._unsub_demand.pop(route_name, None)
+        if unsub is not None:
+            unsub()
+        for state in (self._next_refresh, self._failures, self._active):
+            state.pop(route_name, None)
+
+        entity_registry = er.async_get(self.hass)
+        for entity in self.route_entities.pop(route_name, []):
+            entity_id = entity.entity_id
+            await entity.async_remove()
+            # Changed routes keep their registry entries so the new entities reclaim the same entity ids.
+            if forget_entities and entity_registry.async_get(entity_id) is not None:
+                entity_registry.async_remove(entity_id)
+
+        if forget_data:
+            if self.data_store is not None:
+                self.data_store.async_remove_route(route_name)
+            if self.history_store is not None:
+                self.history_store.async_remove_route(route_name)
+
+    def _stagger(self, now: datetime, route_names: Optional[Iterable[str]] = None) -> None:
+        count = len(self.coordinators) or 1
+        for index, (route_name, coordinator) in enumerate(self.coordinators.items()):
+            if route_names is not None and route_name not in route_names:
+                continue
+            interval = coordinator.refresh_interval
+            offset = interval * index / count
+            if self._failures.get(route_name):
+                self._next_refresh[route_name] = now + self._retry_delay(route_name, interval)
+            elif coordinator.data is not None and coordinator.data.stale and coordinator.last_fetched:
+                # Restored at startup: refresh when the saved data would have been due anyway,
+                # spreading the ones already overdue like fresh routes.
+                due = coordinator.last_fetched + interval
+                self._next_refresh[route_name] = due if due > now else now + offset
+            else:
+                self._next_refresh[route_name] = now + interval + offset
+
+    def _retry_delay(self, route_name: str, interval: timedelta) -> timedelta:
+        failures = self._failures.get(route_name, 1)
+        return min(FAILED_REFRESH_RETRY_DELAY * 2 ** (failures - 1), interval)
+
+    @callback
+    def _async_check_demand(self, route_name: str, now: datetime) -> None:
+        """Refresh a route as soon as one of its activation entities turns active."""
+        active = self.coordinators[route_name].is_active
+        was_active = self._active.get(route_name, active)
+        self._active[route_name] = active
+        if active and not was_active:
+            _LOGGER.debug(f"Route {route_name} became active, refreshing now")
+            self._next_refresh[route_name] = now
+            self._async_refresh_if_due(route_name, now)
+
+    @callback
+    def _async_tick(self, now: datetime) -> None:
+        for route_name in self.coordinators:
+            # Calendar lead times pass without a state change, so look every tick.
+            self._async_check_demand(route_name, now)
+            self._async_refresh_if_due(route_name, now)
+
+    @callback
+    def _async_refresh_if_due(self, route_name: str, now: datetime) -> None:
+        coordinator = self.coordinators[route_name]
+        if route_name in self._in_flight or coordinator.is_paused:
+            return
+        due = self._next_refresh.setdefault(route_name, now)
+        if now < due:
+            return
+        self._next_refresh[route_name] = now + coordinator.refresh_interval
+        task = self.hass.async_create_task(self._async_refresh_route(route_name, coordinator))
+        if not task.done():
+            self._in_flight[route_name] = task
+
+    async def _async_refresh_route(self, route_name: str, coordinator: KakaoNaviDataUpdateCoordinator) -> None:
+        try:
+            await coordinator.async_refresh()
+        except Exception as err:
+            _LOGGER.error(f"Scheduled refresh failed for route {route_name}: {str(err)}")
+        finally:
+            # A cancelled task of a replaced route must not clear the new coordinator's task.
+            if self._in_flight.get(route_name) is asyncio.current_task():
+                del self._in_flight[route_name]
+
+        if not coordinator.refresh_failed:
+            self._failures.pop(route_name, None)
+            # The interval may have changed with the new data (adaptive polling, quota).
+            self._next_refresh[route_name] = dt_util.utcnow() + coordinator.refresh_interval
+        else:
+            self._failures[route_name] = self._failures.get(route_name, 0) + 1
+            self._next_refresh[route_name] = dt_util.utcnow() + self._retry_delay(
+                route_name, coordinator.refresh_interval
+            )
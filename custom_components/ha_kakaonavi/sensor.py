@@ -1,14 +1,17 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from .const import (
     DOMAIN, CONF_ROUTE_NAME, UNIT_OF_TIME, UNIT_OF_DISTANCE,
-    CONF_PRIORITY
+    CONF_PRIORITY, CONF_MATRIX_DIRECTION, MATRIX_ONE_TO_MANY, CONF_LOCATION, CONF_TARGETS,
+    CONF_TARGET_NAME, CONF_TARGET_ADDRESS
 )
-from .coordinator import KakaoNaviDataUpdateCoordinator
+from .coordinator import KakaoNaviDataUpdateCoordinator, KakaoNaviMatrixCoordinator
+from .quota import KakaoNaviQuotaManager
 
 class KakaoNaviEtaSensor(CoordinatorEntity, SensorEntity):
     _attr_has_entity_name = True
@@ -37,38 +40,185 @@ class KakaoNaviEtaSensor(CoordinatorEntity, SensorEntity):
 
     @property
     def state(self) -> Optional[float]:
-        try:
-            return round(self.coordinator.data["current"]["routes"][0]["summary"]["duration"] / 60, 2)
-        except (KeyError, IndexError, TypeError):
+        data = self.coordinator.data
+        if data is None or data.current is None:
             return None
+        return round(data.current.duration / 60, 2)
 
     @property
     def extra_state_attributes(self) -> Dict[str, Any]:
-        try:
-            current_data = self.coordinator.data["current"]["routes"][0]["summary"]
-            future_data = self.coordinator.data["future"]["routes"][0]["summary"]
-            return {
-                "current_eta": round(current_data["duration"] / 60, 2),
-                "future_eta": round(future_data["duration"] / 60, 2),
-                "eta_difference": round((future_data["duration"] - current_data["duration"]) / 60, 2),
-                "distance": f"{round(current_data['distance'] / 1000, 2)} {UNIT_OF_DISTANCE}",
-                "taxi_fare": f"{current_data['fare']['taxi']:,}",
-                "toll_fare": f"{current_data['fare']['toll']:,}",
-                "priority": self.coordinator.route.get(CONF_PRIORITY),
-            }
-        except (KeyError, IndexError, TypeError):
+        data = self.coordinator.data
+        if data is None or data.current is None:
             return {}
+        # Routes without forecast horizons, or whose forecasts failed, still show the current route.
+        current, future = data.current, data.future
+        typical_eta = self.coordinator.typical_eta(current.fetched_at)
+        return {
+            "current_eta": round(current.duration / 60, 2),
+            "future_eta": round(future.duration / 60, 2) if future is not None else None,
+            "eta_difference": round((future.duration - current.duration) / 60, 2) if future is not None else None,
+            "forecasts": [
+                {
+                    "horizon": horizon,
+                    "departure": forecast.departure_time.isoformat() if forecast.departure_time else None,
+                    "eta": round(forecast.duration / 60, 2),
+                    "fetched": forecast.fetched_at.isoformat(),
+                }
+                for horizon, forecast in sorted(data.forecasts.items())
+            ],
+            "distance": f"{round(current.distance / 1000, 2)} {UNIT_OF_DISTANCE}",
+            "taxi_fare": f"{current.taxi_fare:,}",
+            "toll_fare": f"{current.toll_fare:,}",
+            "priority": self.coordinator.route.get(CONF_PRIORITY),
+            "update_interval": round(self.coordinator.refresh_interval.total_seconds() / 60, 2),
+            "last_fetched": data.fetched_at.isoformat() if data.fetched_at else None,
+            "typical_eta": round(typical_eta / 60, 2) if typical_eta is not None else None,
+            "active": self.coordinator.is_active,
+            "stale": data.stale,
+            "predicted": data.predicted,
+        }
+
+class KakaoNaviMatrixEtaSensor(CoordinatorEntity, SensorEntity):
+    """ETA to (or from) one target of a matrix route."""
+
+    _attr_has_entity_name = True
+    _attr_icon = "mdi:map-marker-distance"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UNIT_OF_TIME
+
+    def __init__(self, coordinator: KakaoNaviMatrixCoordinator, config_entry: ConfigEntry,
+                 route_name: str, target: Dict[str, str]) -> None:
+        super().__init__(coordinator)
+        self._target_name = target[CONF_TARGET_NAME]
+        self._target_address = target[CONF_TARGET_ADDRESS]
+        self._attr_unique_id = f"{config_entry.entry_id}_{route_name}_{self._target_name}"
+        self._attr_name = f"Kakao Navi ETA - {route_name} - {self._target_name}"
+        self._attr_translation_key = "kakaonavi_matrix_eta"
+
+    @property
+    def available(self) -> bool:
+        data = self.coordinator.data
+        return super().available and data is not None and self._target_name in data.targets
+
+    @property
+    def native_value(self) -> Optional[float]:
+        data = self.coordinator.data
+        if data is None or self._target_name not in data.targets:
+            return None
+        return round(data.targets[self._target_name].duration / 60, 2)
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        data = self.coordinator.data
+        if data is None or self._target_name not in data.targets:
+            return {}
+        target = data.targets[self._target_name]
+        route = self.coordinator.route
+        one_to_many = route.get(CONF_MATRIX_DIRECTION, MATRIX_ONE_TO_MANY) == MATRIX_ONE_TO_MANY
+        return {
+            "origin": route[CONF_LOCATION] if one_to_many else self._target_address,
+            "destination": self._target_address if one_to_many else route[CONF_LOCATION],
+            "distance": f"{round(target.distance / 1000, 2)} {UNIT_OF_DISTANCE}",
+            "priority": route.get(CONF_PRIORITY),
+            "update_interval": round(self.coordinator.refresh_interval.total_seconds() / 60, 2),
+            "last_fetched": target.fetched_at.isoformat(),
+            "active": self.coordinator.is_active,
+            "stale": data.stale,
+        }
+
+class KakaoNaviRefreshTimeSensor(CoordinatorEntity, SensorEntity):
+    """How long the last refresh of a route took, with rolling timing histograms."""
+
+    _attr_has_entity_name = True
+    _attr_icon = "mdi:timer-outline"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+
+    def __init__(self, coordinator: KakaoNaviDataUpdateCoordinator, config_entry: ConfigEntry,
+                 route_name: str) -> None:
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{config_entry.entry_id}_{route_name}_refresh_time"
+        self._attr_name = f"Kakao Navi refresh time - {route_name}"
+        self._attr_translation_key = "kakaonavi_refresh_time"
+
+    @property
+    def available(self) -> bool:
+        # Failed refreshes are exactly what this sensor is meant to show.
+        return True
+
+    @property
+    def native_value(self) -> Optional[float]:
+        return self.coordinator.metrics.refresh.last
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        metrics = self.coordinator.metrics
+        return {
+            "refresh_p95_ms": metrics.refresh.as_dict()["p95_ms"],
+            "geocode_p95_ms": metrics.geocode.as_dict()["p95_ms"],
+            "directions_p95_ms": metrics.directions.as_dict()["p95_ms"],
+            "future_directions_p95_ms": metrics.future_directions.as_dict()["p95_ms"],
+            "cache_hits": metrics.cache_hits,
+            "cache_misses": metrics.cache_misses,
+            "retries": metrics.retries,
+            "errors": metrics.errors,
+        }
+
+
+class KakaoNaviQuotaSensor(SensorEntity):
+    """Calls left in today's budget of the entry's API key."""
+
+    _attr_has_entity_name = True
+    _attr_icon = "mdi:counter"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    # The counter lives in memory, so polling it costs nothing.
+    _attr_should_poll = True
+
+    def __init__(self, quota: KakaoNaviQuotaManager, config_entry: ConfigEntry) -> None:
+        self._quota = quota
+        self._attr_unique_id = f"{config_entry.entry_id}_quota_remaining"
+        self._attr_name = "Kakao Navi API quota remaining"
+        self._attr_translation_key = "kakaonavi_quota_remaining"
+
+    @property
+    def native_value(self) -> int:
+        return self._quota.remaining
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        return {
+            "used_today": self._quota.used_today,
+            "daily_limit": self._quota.daily_limit,
+            "interval_multiplier": round(self._quota.interval_multiplier, 2),
+        }
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry,
                             async_add_entities: AddEntitiesCallback) -> None:
-    coordinators = hass.data[DOMAIN][entry.entry_id]
+    scheduler = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_route_entities(route_name: str, coordinator: KakaoNaviDataUpdateCoordinator) -> None:
+        # Routes whose first refresh failed are still added; they stay unavailable until a retry succeeds.
+        sensors: List[SensorEntity] = []
+        if isinstance(coordinator, KakaoNaviMatrixCoordinator):
+            sensors.extend(KakaoNaviMatrixEtaSensor(coordinator, entry, route_name, target)
+                           for target in coordinator.route[CONF_TARGETS])
+        else:
+            sensors.append(KakaoNaviEtaSensor(coordinator, entry, route_name))
+        sensors.append(KakaoNaviRefreshTimeSensor(coordinator, entry, route_name))
+        # Kept so the route's entities can be removed when the route changes at runtime.
+        scheduler.route_entities[route_name] = sensors
+        async_add_entities(sensors)
 
-    sensors = []
-    for route_name, coordinator in coordinators.items():
-        if coordinator.data is None or "current" not in coordinator.data or "routes" not in coordinator.data["current"]:
-            continue
-        sensor = KakaoNaviEtaSensor(coordinator, entry, route_name)
-        sensors.append(sensor)
+    scheduler.async_add_route_entities = async_add_route_entities
+    for route_name, coordinator in scheduler.coordinators.items():
+        async_add_route_entities(route_name, coordinator)
 
-    async_add_entities(sensors)
+    if scheduler.client.quota is not None:
+        async_add_entities([KakaoNaviQuotaSensor(scheduler.client.quota, entry)])
 
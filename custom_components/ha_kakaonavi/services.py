@@ -0,0 +1,165 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+from .coordinator import KakaoNaviDataUpdateCoordinator, KakaoNaviMatrixCoordinator
+from .models import RouteSummary
+from .routes import ROUTE_SCHEMA, async_update_entry_routes, async_validate_routes, merge_routes
+from .const import (
+    DOMAIN, CONF_START, CONF_END, CONF_WAYPOINT, CONF_PRIORITY, CONF_ROUTES, CONF_ROUTE_NAME,
+    SERVICE_MANAGE_ROUTES, ATTR_CONFIG_ENTRY_ID, ATTR_ROUTES, ATTR_REMOVE,
+    SERVICE_FIND_OPTIMAL_DEPARTURE_TIME, ATTR_SENSOR_NAME, ATTR_START_TIME, ATTR_END_TIME, ATTR_INTERVAL,
+    DEFAULT_SWEEP_INTERVAL, MIN_SWEEP_INTERVAL, MAX_SWEEP_SLOTS, SWEEP_MAX_CONCURRENT_REQUESTS
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+FIND_OPTIMAL_DEPARTURE_TIME_SCHEMA = vol.Schema({
+    vol.Required(ATTR_SENSOR_NAME): cv.entity_id,
+    vol.Required(ATTR_START_TIME): cv.datetime,
+    vol.Required(ATTR_END_TIME): cv.datetime,
+    vol.Optional(ATTR_INTERVAL, default=DEFAULT_SWEEP_INTERVAL): vol.All(
+        vol.Coerce(int), vol.Range(min=MIN_SWEEP_INTERVAL)),
+})
+
+MANAGE_ROUTES_SCHEMA = vol.Schema({
+    vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_ROUTES, default=[]): vol.All(cv.ensure_list, [ROUTE_SCHEMA]),
+    vol.Optional(ATTR_REMOVE, default=[]): vol.All(cv.ensure_list, [cv.string]),
+})
+
+
+def async_get_route_coordinator(hass: HomeAssistant, entity_id: str) -> KakaoNaviDataUpdateCoordinator:
+    """Find the route coordinator behind one of this integration's ETA sensors."""
+    entity_entry = er.async_get(hass).async_get(entity_id)
+    if entity_entry is None or entity_entry.platform != DOMAIN:
+        raise HomeAssistantError(f"{entity_id} is not a Kakao Navi sensor")
+    scheduler = hass.data.get(DOMAIN, {}).get(entity_entry.config_entry_id)
+    if scheduler is None:
+        raise HomeAssistantError(f"The config entry of {entity_id} is not loaded")
+    route_name = entity_entry.unique_id[len(entity_entry.config_entry_id) + 1:]
+    coordinator = scheduler.coordinators.get(route_name)
+    if coordinator is None:
+        raise HomeAssistantError(f"No route found for {entity_id}")
+    return coordinator
+
+
+def _departure_slots(start: datetime, end: datetime, step: timedelta) -> List[datetime]:
+    now = dt_util.now()
+    slots: Dict[str, datetime] = {}
+    slot = start
+    while slot <= end:
+        # The API only forecasts future departures at minute resolution.
+        if slot >= now:
+            slots.setdefault(slot.strftime("%Y%m%d%H%M"), slot.replace(second=0, microsecond=0))
+        slot += step
+    return list(slots.values())
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    async def async_find_optimal_departure_time(call: ServiceCall) -> ServiceResponse:
+        coordinator = async_get_route_coordinator(hass, call.data[ATTR_SENSOR_NAME])
+        if isinstance(coordinator, KakaoNaviMatrixCoordinator):
+            raise HomeAssistantError("Matrix routes have no departure time forecasts to sweep")
+        start = dt_util.as_local(call.data[ATTR_START_TIME])
+        end = dt_util.as_local(call.data[ATTR_END_TIME])
+        if end < start:
+            raise HomeAssistantError("end_time must not be before start_time")
+
+        slots = _departure_slots(start, end, timedelta(minutes=call.data[ATTR_INTERVAL]))
+        if not slots:
+            raise HomeAssistantError("The requested time range has no departure times in the future")
+        if len(slots) > MAX_SWEEP_SLOTS:
+            raise HomeAssistantError(f"The requested range needs {len(slots)} queries (maximum {MAX_SWEEP_SLOTS})")
+
+        client = coordinator.client
+        route = coordinator.route
+        # Geocode once; every slot reuses the same coordinates.
+        try:
+            params = await client.resolve_route(
+                coordinator.resolve_location(route[CONF_START]),
+                coordinator.resolve_location(route[CONF_END]),
+                coordinator.resolve_location(route.get(CONF_WAYPOINT)),
+                route.get(CONF_PRIORITY),
+            )
+        except UpdateFailed as err:
+            raise HomeAssistantError(str(err)) from err
+        semaphore = asyncio.Semaphore(SWEEP_MAX_CONCURRENT_REQUESTS)
+
+        async def async_fetch_slot(departure: datetime) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    data = await client.future_direction_from_params(params, departure.strftime("%Y%m%d%H%M"))
+                except HomeAssistantError as err:
+                    _LOGGER.warning(f"No forecast for departure at {departure.isoformat()}: {str(err)}")
+                    return None
+            summary = RouteSummary.from_response(data, dt_util.now(), departure)
+            if summary is None:
+                return None
+            return {
+                "departure": departure.isoformat(),
+                "arrival": (departure + timedelta(seconds=summary.duration)).isoformat(),
+                "eta": round(summary.duration / 60, 2),
+                "distance": round(summary.distance / 1000, 2),
+            }
+
+        curve = [slot for slot in await asyncio.gather(*(async_fetch_slot(slot) for slot in slots)) if slot]
+        if not curve:
+            raise HomeAssistantError("Failed to get any forecast for the requested time range")
+
+        best = min(curve, key=lambda slot: slot["eta"])
+        return {
+            "best_departure": best["departure"],
+            "best_arrival": best["arrival"],
+            "best_eta": best["eta"],
+            "curve": curve,
+        }
+
+    async def async_manage_routes(call: ServiceCall) -> ServiceResponse:
+        entry = hass.config_entries.async_get_entry(call.data[ATTR_CONFIG_ENTRY_ID])
+        if entry is None or entry.domain != DOMAIN:
+            raise HomeAssistantError(f"{call.data[ATTR_CONFIG_ENTRY_ID]} is not a Kakao Navi config entry")
+        scheduler = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+        if scheduler is None:
+            raise HomeAssistantError(f"The config entry {entry.title} is not loaded")
+
+        routes = call.data[ATTR_ROUTES]
+        names = [route[CONF_ROUTE_NAME] for route in routes]
+        if len(set(names)) != len(names):
+            raise HomeAssistantError("Each route may only be given once")
+        existing = entry.options.get(CONF_ROUTES, [])
+        unknown = set(call.data[ATTR_REMOVE]) - {route[CONF_ROUTE_NAME] for route in existing}
+        if unknown:
+            raise HomeAssistantError(f"Unknown routes to remove: {', '.join(sorted(unknown))}")
+
+        # Every address is checked before anything changes, so a bad route never leaves a half-applied batch.
+        errors = await async_validate_routes(scheduler.client, routes)
+        if errors:
+            raise HomeAssistantError("Invalid routes: " + "; ".join(
+                f"{route_name} ({error})" for route_name, error in errors.items()))
+
+        changes = await async_update_entry_routes(
+            hass, entry, merge_routes(existing, routes, call.data[ATTR_REMOVE]))
+        return changes or {}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_MANAGE_ROUTES,
+        async_manage_routes,
+        schema=MANAGE_ROUTES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_OPTIMAL_DEPARTURE_TIME,
+        async_find_optimal_departure_time,
+        schema=FIND_OPTIMAL_DEPARTURE_TIME_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
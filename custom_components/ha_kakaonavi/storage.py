@@ -0,0 +1,88 @@
+from typing import Any, Dict, Iterable
+import logging
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .models import KakaoNaviRouteData, RouteSummary
+from .const import (
+    DOMAIN,
+    ROUTE_DATA_STORAGE_VERSION,
+    ROUTE_DATA_SAVE_DELAY,
+    RESTORED_DATA_MAX_AGE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class KakaoNaviRouteDataStore:
+    """Last good parsed result of every route of a config entry.
+
+    Saved after each successful refresh so that entities can show values
+    right after a restart instead of waiting for the first API round trip.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store = Store(hass, ROUTE_DATA_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.route_data")
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    async def async_load(self, route_names: Iterable[str]) -> Dict[str, KakaoNaviRouteData]:
+        """Load the saved routes that are still configured and recent enough to show."""
+        stored = await self._store.async_load() or {}
+        configured = set(route_names)
+        self._routes = {name: data for name, data in stored.get("routes", {}).items() if name in configured}
+
+        restored = {}
+        now = dt_util.now()
+        for route_name, saved in self._routes.items():
+            if not isinstance(saved, dict):
+                _LOGGER.warning(f"Discarding unreadable saved data of route {route_name}")
+                continue
+            forecasts = {}
+            for horizon, forecast in saved.get("forecasts", {}).items():
+                summary = RouteSummary.from_dict(forecast)
+                if summary is not None:
+                    forecasts[int(horizon)] = summary
+            targets = {}
+            for target_name, target in saved.get("targets", {}).items():
+                summary = RouteSummary.from_dict(target)
+                if summary is not None:
+                    targets[target_name] = summary
+            # Marked stale until the first live refresh replaces it.
+            data = KakaoNaviRouteData(
+                current=RouteSummary.from_dict(saved.get("current")),
+                future=RouteSummary.from_dict(saved.get("future")),
+                forecasts=forecasts,
+                targets=targets,
+                stale=True,
+            )
+            if saved.get("current") and data.current is None:
+                _LOGGER.warning(f"Discarding unreadable saved data of route {route_name}")
+                continue
+            if data.fetched_at is None or now - data.fetched_at > RESTORED_DATA_MAX_AGE:
+                continue
+            restored[route_name] = data
+        return restored
+
+    def async_save_route(self, route_name: str, data: KakaoNaviRouteData) -> None:
+        self._routes[route_name] = {
+            "current": data.current.as_dict() if data.current else None,
+            "future": data.future.as_dict() if data.future else None,
+            "forecasts": {str(horizon): forecast.as_dict() for horizon, forecast in data.forecasts.items()},
+            "targets": {name: target.as_dict() for name, target in data.targets.items()},
+        }
+        self._store.async_delay_save(self._data_to_save, ROUTE_DATA_SAVE_DELAY)
+
+    def async_remove_route(self, route_name: str) -> None:
+        if self._routes.pop(route_name, None) is not None:
+            self._store.async_delay_save(self._data_to_save, ROUTE_DATA_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+    def _data_to_save(self) -> Dict[str, Any]:
+        return {"routes": self._routes}
+
+
+async def async_remove_route_data(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the saved route data of a config entry that is being removed."""
+    await KakaoNaviRouteDataStore(hass, entry_id).async_remove()
@@ -0,0 +1,85 @@
+"""Setup smoke tests: a config entry set up against the local fake Kakao server.
+
+Requires ``homeassistant`` to be installed. Run from the repository root::
+
+    python -m pytest tests
+"""
+import asyncio
+import tempfile
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from benchmarks.bench_kakaonavi import (  # noqa: E402
+    BENCH_API_KEY, BenchConfigEntry, build_matrix_routes, build_routes, create_hass,
+)
+from benchmarks.fake_kakao_server import FakeKakaoServer, FakeServerConfig, LOCAL_SEARCH_PATH, NAVI_PREFIX  # noqa: E402
+from custom_components.ha_kakaonavi import api, async_setup_entry, async_unload_entry  # noqa: E402
+from custom_components.ha_kakaonavi.const import DOMAIN, DATA_QUOTA_MANAGERS  # noqa: E402
+from custom_components.ha_kakaonavi.quota import KakaoNaviQuotaManager, api_key_id  # noqa: E402
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    server = FakeKakaoServer(FakeServerConfig(latency=0, jitter=0, seed=1))
+    loop = asyncio.new_event_loop()
+    base_url = loop.run_until_complete(server.async_start())
+    monkeypatch.setattr(api, "BASE_NAVI_URL", f"{base_url}{NAVI_PREFIX}")
+    monkeypatch.setattr(api, "BASE_LOCAL_URL", f"{base_url}{LOCAL_SEARCH_PATH}")
+    yield server, loop
+    loop.run_until_complete(server.async_stop())
+    loop.close()
+
+
+def _run_entry(loop, routes, check) -> None:
+    async def run() -> None:
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = await create_hass(config_dir)
+            hass.data.setdefault(DOMAIN, {}).setdefault(DATA_QUOTA_MANAGERS, {})[api_key_id(BENCH_API_KEY)] = (
+                KakaoNaviQuotaManager(hass, BENCH_API_KEY, daily_limit=10 ** 9, requests_per_second=1000))
+            entry = BenchConfigEntry("smoke", routes)
+            try:
+                assert await async_setup_entry(hass, entry)
+                await asyncio.gather(*entry.background_tasks)
+                await check(hass.data[DOMAIN][entry.entry_id])
+                assert await async_unload_entry(hass, entry)
+            finally:
+                entry.async_run_unload_callbacks()
+                await hass.async_stop(force=True)
+
+    loop.run_until_complete(run())
+
+
+def test_setup_refreshes_every_route(fake_server):
+    server, loop = fake_server
+
+    async def check(scheduler) -> None:
+        assert set(scheduler.coordinators) == {"route 0", "route 1", "matrix 0", "matrix 1"}
+        for coordinator in scheduler.coordinators.values():
+            assert coordinator.last_update_success
+            assert coordinator.refresh_interval.total_seconds() > 0
+            assert not coordinator.data.stale
+        assert scheduler.coordinators["route 0"].data.current is not None
+        assert scheduler.coordinators["matrix 0"].data.targets
+
+    _run_entry(loop, build_routes(2) + build_matrix_routes(2, 3), check)
+    assert server.calls[f"{NAVI_PREFIX}/directions"] == 2
+
+
+def test_failed_refresh_keeps_last_good_data(fake_server, monkeypatch):
+    server, loop = fake_server
+    monkeypatch.setattr(api, "backoff_delay", lambda attempt: 0)
+
+    async def check(scheduler) -> None:
+        coordinator = scheduler.coordinators["route 0"]
+        good = coordinator.data.current
+        server.config.error_rate = 1.0
+        scheduler.client.response_cache.clear()
+        await scheduler.async_first_refresh()
+        assert coordinator.refresh_failed
+        assert coordinator.data.stale
+        assert coordinator.data.current == good
+        assert scheduler.data_store._routes["route 0"]["current"] == good.as_dict()
+
+    _run_entry(loop, build_routes(1), check)